@@ -0,0 +1,226 @@
+"""Micro-benchmarks of the per-frame hot paths, with regression gates.
+
+Synthetic frames and hands are pushed through the detector's landmark
+accessors and the keyboard's drawing and hit-testing, at several frame sizes
+and text lengths. Hands.process is replaced by a stub that returns fixed
+landmarks, so the numbers measure this repository's code rather than the
+model, and no camera is needed.
+
+Each case reports the best and median time per call over several rounds.
+When a baseline file exists, a case whose best time is slower than the
+baseline by more than the threshold fails the run (exit status 1). Changes
+smaller than a few microseconds are timer and scheduling noise on the
+cheapest cases, so they never count as regressions.
+
+    python -m benchmarks.run                       # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save                # record a new baseline on this machine
+    python -m benchmarks.run -k draw --resolutions 720p --threshold 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import RESOLUTIONS, StubHands, frame, hand_at, key_center, text
+from hand_detector import HandDetector, hand_positions_from_landmarks
+from virtual_keyboard import VirtualKeyboard
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TEXT_LENGTHS = (100, 5000)
+HOVER_KEY = 'G'
+
+
+def make_keyboard(width, height, text_length=100):
+    # A fixed clock keeps the dwell from ever completing, so no key is pressed while timing
+    keyboard = VirtualKeyboard(clock=lambda: 10.0)
+    keyboard.primary.buffer.set_text(text(text_length))
+    keyboard.get_layout(width, height)
+    return keyboard
+
+
+def detector_cases(name, width, height, real_hands=False):
+    image = frame(width, height)
+    probe = make_keyboard(width, height)
+    hands = [hand_at(key_center(probe, HOVER_KEY, width, height)), hand_at((0.2, 0.5))]
+
+    # The stub cannot follow a crop, so time the full-frame path: resize, BGR to RGB and landmark extraction
+    detector = HandDetector(max_hands=2, roi_tracking=False)
+    if not real_hands:
+        detector.hands = StubHands(hands)
+    detector.find_hands(image, draw=False)
+
+    def get_hand_positions():
+        detector._px_shape = None  # find_hands resets the pixel cache on every real frame
+        return detector.get_hand_positions(image)
+
+    def get_finger_positions():
+        detector._px_shape = None
+        return detector.get_finger_positions(image)
+
+    yield f'find_hands/{name}', lambda: detector.find_hands(image, draw=False)
+    yield f'get_hand_positions/{name}', get_hand_positions
+    yield f'get_finger_positions/{name}', get_finger_positions
+
+
+def keyboard_cases(name, width, height):
+    image = frame(width, height)
+    shape = image.shape
+    keyboard = make_keyboard(width, height)
+    landmarks = hand_at(key_center(keyboard, HOVER_KEY, width, height))[None] * np.float32((width, height, width))
+    hand_positions = hand_positions_from_landmarks(landmarks)
+    index_tip = tuple(hand_positions[8, 1:].tolist())
+
+    keyboard.primary.hover_key = HOVER_KEY
+    keyboard.primary.hover_start_time = 9.5
+    yield f'draw_keyboard/{name}', lambda: keyboard.draw_keyboard(image)
+
+    def keyboard_layer():
+        keyboard.invalidate_layer()  # Every key, special row included, is drawn again
+        return keyboard._get_keyboard_layer(height, width)
+
+    yield f'keyboard_layer/{name}', keyboard_layer
+
+    margin = keyboard.get_layout(width, height).margin
+    for length in TEXT_LENGTHS:
+        typing = make_keyboard(width, height, length)
+        yield f'draw_text_area/{name}/text={length}', lambda typing=typing: typing.draw_text_area(
+            image, width, height, margin)
+
+        def draw_text_area_typing(typing=typing):
+            buffer = typing.primary.buffer
+            if buffer.text.endswith('X'):
+                buffer.delete_back()
+            else:
+                buffer.insert('X')
+            typing.draw_text_area(image, width, height, margin)
+
+        yield f'draw_text_area_typing/{name}/text={length}', draw_text_area_typing
+
+    yield f'check_key_hover/{name}', lambda: keyboard.check_key_hover(index_tip, shape)
+    yield f'check_hover_and_pinch/{name}', lambda: keyboard.check_hover_and_pinch(hand_positions, shape)
+    if name == '720p':
+        yield 'check_pinch', lambda: keyboard.check_pinch(hand_positions)
+
+
+def collect_cases(resolutions, real_hands=False):
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        yield from detector_cases(name, width, height, real_hands)
+        yield from keyboard_cases(name, width, height)
+
+
+def measure(function, repeat=5, min_round=0.05):
+    """Best and median seconds per call over `repeat` rounds of at least `min_round` seconds"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(int(number * min_round / max(elapsed, 1e-9)), 1)
+    rounds = [t / number for t in timer.repeat(repeat, number)]
+    return min(rounds), statistics.median(rounds), number
+
+
+def run(resolutions, pattern=None, repeat=5, real_hands=False):
+    results = {}
+    for name, function in collect_cases(resolutions, real_hands):
+        if pattern and pattern not in name:
+            continue
+        best, median, number = measure(function, repeat)
+        results[name] = {'best_us': best * 1e6, 'median_us': median * 1e6, 'calls': number}
+        print(f"  {name:<42}{best * 1e6:11.1f}{median * 1e6:11.1f} us", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_change_us=5.0):
+    """Print the change against the baseline and return the names of the regressed cases"""
+    regressions = []
+    print(f"\n{'case':<42}{'best':>11}{'baseline':>11}{'change':>9}")
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<42}{stats['best_us']:11.1f}{'-':>11}{'new':>9}")
+            continue
+        change = stats['best_us'] / reference['best_us'] - 1
+        flag = ''
+        if change > threshold and stats['best_us'] - reference['best_us'] > min_change_us:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<42}{stats['best_us']:11.1f}{reference['best_us']:11.1f}{change * 100:8.0f}%{flag}")
+    return regressions
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the frame loop hot paths")
+    parser.add_argument("-k", dest="pattern", metavar="TEXT", help="only run cases whose name contains TEXT")
+    parser.add_argument("--resolutions", default=','.join(RESOLUTIONS),
+                        help=f"comma separated frame sizes out of {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--repeat", type=int, default=5, metavar="N", help="timing rounds per case")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, metavar="PATH", help="baseline results file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a case is this much slower than its baseline (0.25 = 25%%)")
+    parser.add_argument("--min-change-us", type=float, default=5.0, metavar="US",
+                        help="ignore slowdowns smaller than this many microseconds per call")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", "-o", metavar="PATH", help="also write the results as JSON here")
+    parser.add_argument("--real-hands", action="store_true",
+                        help="run the real MediaPipe model in find_hands instead of the stub")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    resolutions = [name.strip() for name in args.resolutions.split(',') if name.strip()]
+    unknown = [name for name in resolutions if name not in RESOLUTIONS]
+    if unknown:
+        sys.exit(f"Unknown resolution: {', '.join(unknown)}")
+
+    print(f"{'case':<44}{'best':>11}{'median':>11}")
+    results = run(resolutions, args.pattern, args.repeat, args.real_hands)
+    report = {'machine': machine_info(), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f).get('results', {})
+            report['results'] = dict(previous, **results)  # A partial run only replaces its own cases
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != report['machine']:
+        print("Note: the baseline was recorded on a different machine or software versions")
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_change_us)
+    limit = f"{args.threshold * 100:.0f}% (and {args.min_change_us:g} us)"
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {limit}")
+        sys.exit(1)
+    print(f"\nAll {len(results)} cases within {limit} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Synthetic frames, hands and MediaPipe results for the benchmarks"""
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from hand_detector import NUM_LANDMARKS, INDEX_TIP, THUMB_TIP
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+# Open hand in hand-size units, wrist at the origin: (finger base x, direction) per finger
+_FINGERS = [
+    (-0.25, (-0.6, -0.45)),  # thumb
+    (-0.15, (-0.1, -1.0)),   # index
+    (0.0, (0.0, -1.0)),      # middle
+    (0.15, (0.1, -1.0)),     # ring
+    (0.28, (0.25, -0.9)),    # pinky
+]
+
+
+def open_hand():
+    """(21, 3) landmarks of a spread hand, one hand-size unit tall"""
+    hand = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    for finger, (base_x, (dx, dy)) in enumerate(_FINGERS):
+        for joint in range(4):
+            reach = 0.35 + 0.17 * joint
+            hand[1 + finger * 4 + joint] = (base_x + dx * reach * 0.6, -0.3 + dy * reach, -0.02 * joint)
+    return hand
+
+
+def hand_at(index_tip, size=0.25, pinch=False):
+    """Normalized landmarks with the index tip at `index_tip` (normalized x, y)"""
+    hand = open_hand() * np.array((size, size, 1.0), dtype=np.float32)
+    hand[:, :2] += np.asarray(index_tip, dtype=np.float32) - hand[INDEX_TIP, :2]
+    if pinch:
+        hand[THUMB_TIP, :2] = hand[INDEX_TIP, :2] + 0.005
+    return hand
+
+
+def key_center(keyboard, key, width, height):
+    """Normalized center of a key in the keyboard layout for a frame size"""
+    x, y, w, h, _ = keyboard.get_layout(width, height).rects[key]
+    return (x + w / 2) / width, (y + h / 2) / height
+
+
+def frame(width, height, seed=0):
+    """A smooth random BGR frame, so resizes and conversions do real work"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (9, 16, 3), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def text(length, seed=0):
+    """Words of random letters, `length` characters in total"""
+    rng = np.random.default_rng(seed)
+    letters = rng.integers(ord('A'), ord('Z') + 1, length).astype(np.uint8)
+    letters[rng.random(length) < 0.18] = ord(' ')
+    return letters.tobytes().decode()
+
+
+class StubHands:
+    """Stands in for mediapipe Hands: process() returns fixed landmarks without running a model.
+
+    A fresh result is built on every call, like MediaPipe does, because the
+    detector writes crop corrections back into the result it gets.
+    """
+
+    def __init__(self, hands):
+        self.hands = [np.asarray(hand, dtype=np.float32) for hand in hands]
+
+    def process(self, image):
+        multi_hand_landmarks = []
+        for hand in self.hands:
+            landmark = [SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand.tolist()]
+            multi_hand_landmarks.append(SimpleNamespace(landmark=landmark))
+        multi_handedness = [SimpleNamespace(classification=[SimpleNamespace(label='Right')])
+                            for _ in self.hands]
+        return SimpleNamespace(multi_hand_landmarks=multi_hand_landmarks or None,
+                               multi_handedness=multi_handedness or None)
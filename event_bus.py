@@ -0,0 +1,227 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+
+class EventBus:
+    """Delivers keyboard events to sinks on a background thread.
+
+    emit() only appends to a bounded deque, so it never blocks the frame loop.
+    The dispatcher drains the deque in batches and hands each batch to every
+    sink. Within a batch only the newest hover event of each hand is kept.
+    When the queue is full, hover and pinch events are dropped first; key
+    events evict the oldest queued event instead. Both cases count as dropped.
+    """
+
+    def __init__(self, sinks, max_queue=1024, batch_size=64, flush_interval=0.05):
+        self.sinks = list(sinks)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self._queue = deque(maxlen=max_queue)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+
+    def emit(self, event_type, **fields):
+        fields['type'] = event_type
+        fields.setdefault('t', time.time())
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if event_type != 'key':
+                return
+        self._queue.append(fields)
+        if event_type == 'key':
+            self._wakeup.set()  # Keys go out right away, hover and pinch wait for the interval
+
+    def _next_batch(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+
+        # Only the newest hover of each hand matters to a consumer
+        latest_hover = {}
+        for i, event in enumerate(batch):
+            if event['type'] == 'hover':
+                latest_hover[event.get('hand')] = i
+        if len(latest_hover) < sum(event['type'] == 'hover' for event in batch):
+            keep = set(latest_hover.values())
+            coalesced = [e for i, e in enumerate(batch) if e['type'] != 'hover' or i in keep]
+            self.coalesced += len(batch) - len(coalesced)
+            batch = coalesced
+        return batch
+
+    def _dispatch(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+            except Exception as e:
+                print(f"Event sink {type(sink).__name__} failed: {e}")
+        self.delivered += len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self._queue:
+                self._dispatch(self._next_batch())
+
+    def close(self, timeout=1.0):
+        """Let the dispatcher deliver what is still queued, then close every sink"""
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # A sink is stuck; draining here as well would race the dispatcher for the queue
+            print(f"Event bus still busy after {timeout} s, {len(self._queue)} queued events not delivered")
+        else:
+            while self._queue:
+                self._dispatch(self._next_batch())
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self):
+        return {'delivered': self.delivered, 'dropped': self.dropped, 'coalesced': self.coalesced}
+
+
+class StdoutSink:
+    """Prints typed keys the way the frame loop used to"""
+
+    def __init__(self, show_hand=False, stream=None):
+        self.show_hand = show_hand
+        self.stream = stream or sys.stdout
+
+    def write(self, batch):
+        for event in batch:
+            if event['type'] != 'key' or not event.get('text'):
+                continue
+            if self.show_hand:
+                print(f"Typed (hand {event.get('hand', 0) + 1}): {event['text']}", file=self.stream)
+            else:
+                print(f"Typed: {event['text']}", file=self.stream)
+
+    def close(self):
+        self.stream.flush()
+
+
+class FileSink:
+    """Appends every event as one JSON line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def write(self, batch):
+        self._file.write(''.join(json.dumps(event) + '\n' for event in batch))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SocketSink:
+    """Streams events as JSON lines to a UNIX socket path or a TCP host:port.
+
+    Connects lazily and reconnects after a failure. Batches that cannot be
+    sent are dropped rather than retried, so a dead reader never backs up the
+    bus.
+    """
+
+    def __init__(self, address, timeout=0.2, retry_interval=2.0):
+        self.address = address
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.dropped = 0
+        self._sock = None
+        self._next_attempt = 0.0
+
+    def _connect(self):
+        if self.address.startswith('unix:') or os.sep in self.address:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target = self.address[5:] if self.address.startswith('unix:') else self.address
+        else:
+            host, port = self.address.removeprefix('tcp:').rsplit(':', 1)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            target = (host or '127.0.0.1', int(port))
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def write(self, batch):
+        now = time.monotonic()
+        if self._sock is None:
+            if now < self._next_attempt:
+                self.dropped += len(batch)
+                return
+            try:
+                self._sock = self._connect()
+            except OSError as e:
+                self._next_attempt = now + self.retry_interval
+                self.dropped += len(batch)
+                print(f"Event socket {self.address} unavailable: {e}")
+                return
+
+        data = ''.join(json.dumps(event) + '\n' for event in batch).encode()
+        try:
+            self._sock.sendall(data)
+        except OSError:
+            self.dropped += len(batch)
+            self._sock.close()
+            self._sock = None
+            self._next_attempt = now + self.retry_interval
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class UinputSink:
+    """Types key events into the OS through a virtual keyboard device (Linux, needs python-evdev)"""
+
+    SPECIAL_KEYS = {'SPACE': 'KEY_SPACE', 'BACK': 'KEY_BACKSPACE', 'LEFT': 'KEY_LEFT', 'RIGHT': 'KEY_RIGHT'}
+
+    def __init__(self, name="hand-gesture-keyboard"):
+        from evdev import UInput, ecodes
+        self.ecodes = ecodes
+        self.device = UInput(name=name)
+
+    def _tap(self, code):
+        self.device.write(self.ecodes.EV_KEY, code, 1)
+        self.device.write(self.ecodes.EV_KEY, code, 0)
+
+    def write(self, batch):
+        for event in batch:
+            if event['type'] != 'key':
+                continue
+            special = self.SPECIAL_KEYS.get(event.get('key'))
+            if special:
+                self._tap(getattr(self.ecodes, special))
+                continue
+            # Whole words (swipes, suggestions) say what they replaced and inserted
+            for _ in range(event.get('erase', 0)):
+                self._tap(self.ecodes.KEY_BACKSPACE)
+            for char in event.get('insert', event.get('text')) or '':
+                name = 'KEY_SPACE' if char == ' ' else f'KEY_{char.upper()}'
+                code = getattr(self.ecodes, name, None)
+                if code is not None:
+                    self._tap(code)
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
@@ -1,8 +1,81 @@
 import cv2
-import mediapipe as mp
+import numpy as np
+import time
+
+NUM_LANDMARKS = 21
+THUMB_TIP = 4
+INDEX_TIP = 8
+
+FINGER_TIPS = {
+    'thumb_tip': 4,
+    'index_tip': 8,
+    'middle_tip': 12,
+    'ring_tip': 16,
+    'pinky_tip': 20
+}
+
+_LANDMARK_IDS = np.arange(NUM_LANDMARKS, dtype=np.int32)
+
+
+def hand_positions_from_landmarks(landmarks_px):
+    """Flatten (hands, 21, 3) pixel landmarks into (id, cx, cy) int rows"""
+    num_hands = len(landmarks_px)
+    hand_positions = np.empty((num_hands * NUM_LANDMARKS, 3), dtype=np.int32)
+    hand_positions[:, 0] = np.tile(_LANDMARK_IDS, num_hands)
+    hand_positions[:, 1:] = landmarks_px[:, :, :2].reshape(-1, 2)
+    return hand_positions
+
+
+class HandTracker:
+    """Gives hands ids that stay stable across frames.
+
+    Each hand is matched to the nearest known track by landmark centroid
+    (normalized units). Tracks missing for up to `memory` frames can still be
+    resumed, so a hand that briefly drops out keeps its id.
+    """
+
+    def __init__(self, max_distance=0.15, memory=15):
+        self.max_distance = max_distance
+        self.memory = memory
+        self.tracks = {}  # id -> [centroid, frames missing]
+        self.next_id = 0
+
+    def update(self, centroids):
+        ids = [-1] * len(centroids)
+        if self.tracks and len(centroids):
+            known = list(self.tracks)
+            known_centroids = np.array([self.tracks[track_id][0] for track_id in known])
+            distances = np.linalg.norm(centroids[:, None, :] - known_centroids[None, :, :], axis=-1)
+
+            used = set()
+            for flat in np.argsort(distances, axis=None):
+                i, j = divmod(int(flat), len(known))
+                if distances[i, j] > self.max_distance:
+                    break
+                if ids[i] != -1 or j in used:
+                    continue
+                ids[i] = known[j]
+                used.add(j)
+
+        for i, track_id in enumerate(ids):
+            if track_id == -1:
+                ids[i] = track_id = self.next_id
+                self.next_id += 1
+            self.tracks[track_id] = [centroids[i].copy(), -1]
+
+        for track_id in list(self.tracks):
+            self.tracks[track_id][1] += 1
+            if self.tracks[track_id][1] > self.memory:
+                del self.tracks[track_id]
+        return ids
+
 
 class HandDetector:
-    def __init__(self, static_mode=False, max_hands=1, detection_confidence=0.7, tracking_confidence=0.7):
+    def __init__(self, static_mode=False, max_hands=1, detection_confidence=0.7, tracking_confidence=0.7,
+                 inference_width=1280, roi_tracking=True, roi_margin=0.3, full_scan_interval=30,
+                 profiler=None, buffers=None):
+        import mediapipe as mp  # Takes about half a second, so only pay for it when a detector is built
+
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=static_mode,
@@ -13,56 +86,222 @@ class HandDetector:
         self.mp_draw = mp.solutions.drawing_utils
         self.results = None
 
+        self._init_landmarks(max_hands)
+
+        # Inference runs at most inference_width pixels wide, independent of the
+        # display frame. While a hand is tracked only a crop around it is sent
+        # to MediaPipe; a full-frame scan still runs every full_scan_interval
+        # frames so that additional hands can be picked up.
+        self.inference_width = inference_width
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin
+        self.full_scan_interval = full_scan_interval
+        self.roi = None
+        self._frames_since_full_scan = 0
+        self.profiler = profiler  # Optional utils.metrics.StageProfiler
+        self.buffers = buffers  # Optional utils.buffers.FramePool for the resize and RGB images
+
+    def _init_landmarks(self, max_hands):
+        # Landmarks of the current frame as (hand, landmark, xyz). Normalized
+        # coordinates are filled once per frame in find_hands; pixel
+        # coordinates (z scaled by width, like x) are derived on demand.
+        self.max_hands = max_hands
+        self.num_hands = 0
+        self.landmarks = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.landmarks_px = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.handedness = np.full(max_hands, -1, dtype=np.int8)  # 0 = left, 1 = right
+        self.track_ids = np.full(max_hands, -1, dtype=np.int32)
+        self.tracker = HandTracker()
+        self._result_order = list(range(max_hands))  # Row i of the arrays is results hand _result_order[i]
+        self._px_shape = None
+        self._finger_ids = np.array(list(FINGER_TIPS.values()))
+
+    def warm_up(self, width=1280, height=720):
+        """Run one inference on a blank frame so the first real frame is not slowed by graph setup"""
+        scale = min(1.0, self.inference_width / width)
+        blank = np.zeros((int(height * scale), int(width * scale), 3), dtype=np.uint8)
+        self.hands.process(blank)
+        self.results = None
+        self.num_hands = 0
+
+    def _tracking_roi(self, w, h):
+        """Pixel box around the previous frame's hands, or None for a full-frame scan"""
+        if not self.roi_tracking or not self.num_hands:
+            return None
+        if self.num_hands < self.max_hands and self._frames_since_full_scan >= self.full_scan_interval:
+            return None
+
+        points = self.landmarks[:self.num_hands, :, :2].reshape(-1, 2)
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+
+        # Square box around the hands so rotating a hand does not leave the crop
+        half = max((x_max - x_min) * w, (y_max - y_min) * h) * (0.5 + self.roi_margin)
+        cx = (x_min + x_max) / 2 * w
+        cy = (y_min + y_max) / 2 * h
+        x0, y0 = int(max(cx - half, 0)), int(max(cy - half, 0))
+        x1, y1 = int(min(cx + half, w)), int(min(cy + half, h))
+
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            return None
+        if (x1 - x0) * (y1 - y0) > 0.75 * w * h:  # Not worth cropping
+            return None
+        return x0, y0, x1, y1
+
+    def _process(self, image, box):
+        x0, y0, x1, y1 = box
+        crop = image[y0:y1, x0:x1]
+        ch, cw = crop.shape[:2]
+        pool = self.buffers
+        if cw > self.inference_width:
+            scale = self.inference_width / cw
+            size = (self.inference_width, max(int(ch * scale), 1))
+            dst = pool.get('inference', (size[1], size[0], 3)) if pool is not None else None
+            crop = cv2.resize(crop, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+        t0 = time.perf_counter()
+        dst = pool.get('rgb', crop.shape) if pool is not None else None
+        image_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=dst)
+        image_rgb.flags.writeable = False
+        t1 = time.perf_counter()
+        results = self.hands.process(image_rgb)
+
+        if self.profiler is not None:
+            self.profiler.record('bgr_to_rgb', t1 - t0)
+            self.profiler.record('hands_process', time.perf_counter() - t1)
+        return results
+
     def find_hands(self, image, draw=True):
+        """Detect hands in a display frame and return it, drawn on when draw is set.
+
+        Landmarks are always expressed relative to the full display frame,
+        whatever region and resolution inference actually ran at.
+        """
         h, w, _ = image.shape
-        if w > 1280:  
-            scale = 1280 / w
-            new_w, new_h = int(w * scale), int(h * scale)
-            image = cv2.resize(image, (new_w, new_h))
-        
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_rgb.flags.writeable = False  
-        self.results = self.hands.process(image_rgb)
-        image_rgb.flags.writeable = True
-
-        if draw and self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                self.mp_draw.draw_landmarks(
-                    image, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                    self.mp_draw.DrawingSpec(color=(255, 255, 255), thickness=2)
-                )
+
+        box = self._tracking_roi(w, h)
+        if box is not None:
+            self.results = self._process(image, box)
+            if not self.results.multi_hand_landmarks:
+                box = None  # Tracking lost, fall back to a full-frame scan
+
+        if box is None:
+            box = (0, 0, w, h)
+            self.results = self._process(image, box)
+            self._frames_since_full_scan = 0
+        else:
+            self._frames_since_full_scan += 1
+
+        self.roi = box
+        t0 = time.perf_counter()
+        self._extract_landmarks(box, w, h)
+        if self.profiler is not None:
+            self.profiler.record('landmarks', time.perf_counter() - t0)
+
+        if draw:
+            self.draw_hands(image)
 
         return image
 
+    def draw_hands(self, image):
+        if not (self.results and self.results.multi_hand_landmarks):
+            return
+        for hand_landmarks in self.results.multi_hand_landmarks[:self.num_hands]:
+            self.mp_draw.draw_landmarks(
+                image, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
+                self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
+                self.mp_draw.DrawingSpec(color=(255, 255, 255), thickness=2)
+            )
+
+    def _extract_landmarks(self, box=None, w=None, h=None):
+        self.num_hands = 0
+        self._px_shape = None
+        if not (self.results and self.results.multi_hand_landmarks):
+            self.tracker.update(np.empty((0, 2), dtype=np.float32))
+            return
+
+        hands = self.results.multi_hand_landmarks[:self.max_hands]
+        for i, hand_landmarks in enumerate(hands):
+            flat = self.landmarks[i].reshape(-1)
+            flat[0::3] = [lm.x for lm in hand_landmarks.landmark]
+            flat[1::3] = [lm.y for lm in hand_landmarks.landmark]
+            flat[2::3] = [lm.z for lm in hand_landmarks.landmark]
+
+        self.num_hands = len(hands)
+        self._result_order = list(range(self.num_hands))
+        if box is not None and box != (0, 0, w, h):
+            self._crop_to_frame(box, w, h)
+
+        self.handedness[:] = -1
+        for i, handedness in enumerate((self.results.multi_handedness or [])[:len(hands)]):
+            self.handedness[i] = 1 if handedness.classification[0].label == 'Right' else 0
+
+        # Order hands by track id so that row i keeps referring to the same hand
+        n = self.num_hands
+        track_ids = np.array(self.tracker.update(self.landmarks[:n, :, :2].mean(axis=1)), dtype=np.int32)
+        order = np.argsort(track_ids, kind='stable')
+        self.track_ids[:n] = track_ids[order]
+        self.landmarks[:n] = self.landmarks[:n][order]
+        self.handedness[:n] = self.handedness[:n][order]
+        self._result_order = order.tolist()
+
+    def _crop_to_frame(self, box, w, h):
+        x0, y0, x1, y1 = box
+        crop_w, crop_h = x1 - x0, y1 - y0
+        landmarks = self.landmarks[:self.num_hands]
+        landmarks[..., 0] = (landmarks[..., 0] * crop_w + x0) / w
+        landmarks[..., 1] = (landmarks[..., 1] * crop_h + y0) / h
+        landmarks[..., 2] *= crop_w / w
+        self._sync_results()
+
+    def _sync_results(self):
+        """Copy the landmark array back into the raw results, which are used for drawing"""
+        if not (self.results and self.results.multi_hand_landmarks):
+            return
+        hands = self.results.multi_hand_landmarks
+        for index, coords in zip(self._result_order, self.landmarks[:self.num_hands].tolist()):
+            hand_landmarks = hands[index]
+            for lm, (x, y, z) in zip(hand_landmarks.landmark, coords):
+                lm.x, lm.y, lm.z = x, y, z
+
+    def get_landmark_array(self, image=None):
+        """Landmarks of the detected hands, shape (hands, 21, 3).
+
+        Normalized coordinates are returned when no image is given, otherwise
+        pixel coordinates for that image size. The returned array is reused on
+        the next frame; copy it to keep it.
+        """
+        if image is None:
+            return self.landmarks[:self.num_hands]
+
+        h, w = image.shape[:2]
+        if self._px_shape != (h, w):
+            n = self.num_hands
+            np.multiply(self.landmarks[:n], np.array((w, h, w), dtype=np.float32),
+                        out=self.landmarks_px[:n])
+            self._px_shape = (h, w)
+        return self.landmarks_px[:self.num_hands]
+
+    def replace_landmarks(self, landmarks):
+        """Overwrite the current frame's normalized landmarks, e.g. with filtered ones"""
+        self.landmarks[:self.num_hands] = landmarks
+        self._px_shape = None
+        self._sync_results()
+
     def get_hand_positions(self, image):
-        hand_positions = []
-        if self.results and self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                for id, landmark in enumerate(hand_landmarks.landmark):
-                    h, w, _ = image.shape
-                    cx, cy = int(landmark.x * w), int(landmark.y * h)
-                    hand_positions.append((id, cx, cy))
-        return hand_positions
-    
-    def get_finger_positions(self, image):
-        """Get specific finger tip positions"""
-        finger_positions = {}
-        if self.results and self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                h, w, _ = image.shape
-                
-                landmarks = {
-                    'thumb_tip': 4,
-                    'index_tip': 8,
-                    'middle_tip': 12,
-                    'ring_tip': 16,
-                    'pinky_tip': 20
-                }
-                
-                for finger, landmark_id in landmarks.items():
-                    landmark = hand_landmarks.landmark[landmark_id]
-                    cx, cy = int(landmark.x * w), int(landmark.y * h)
-                    finger_positions[finger] = (cx, cy)
-        
-        return finger_positions
\ No newline at end of file
+        """Rows of (id, cx, cy) for every landmark of every hand, as an int array"""
+        return hand_positions_from_landmarks(self.get_landmark_array(image))
+
+    def get_finger_positions(self, image, hand=-1):
+        """Get specific finger tip positions of one hand (the last one by default)"""
+        if not self.num_hands:
+            return {}
+
+        tips = self.get_landmark_array(image)[hand, self._finger_ids, :2].astype(np.int32).tolist()
+        return {finger: tuple(tip) for finger, tip in zip(FINGER_TIPS, tips)}
+
+    def get_all_finger_positions(self, image):
+        """Finger tip positions of every hand, keyed by track id"""
+        tips = self.get_landmark_array(image)[:, self._finger_ids, :2].astype(np.int32).tolist()
+        return {int(track_id): {finger: tuple(tip) for finger, tip in zip(FINGER_TIPS, hand_tips)}
+                for track_id, hand_tips in zip(self.track_ids[:self.num_hands], tips)}
@@ -0,0 +1,155 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class IdleMode:
+    """Cuts CPU use while nobody is in front of the camera.
+
+    After `idle_after` seconds without a hand, inference only runs when a
+    small downsampled frame differs from the previous one (or every
+    `check_interval` seconds as a fallback), and the camera is asked for a
+    lower resolution and frame rate. Motion or a detected hand switches back
+    to full speed on that same frame. Idle frames are scaled up to the normal
+    display size so the keyboard layout does not change.
+
+    Process CPU time is accounted separately for idle and active periods, so
+    the saving can be estimated against the active CPU rate.
+    """
+
+    def __init__(self, idle_after=10.0, idle_fps=5.0, idle_width=640, motion_threshold=12,
+                 motion_fraction=0.01, sample_width=64, check_interval=2.0):
+        self.idle_after = idle_after
+        self.idle_fps = idle_fps
+        self.idle_width = idle_width
+        self.motion_threshold = motion_threshold  # Gray level change that counts as motion
+        self.motion_fraction = motion_fraction  # Share of sampled pixels that must change
+        self.sample_width = sample_width
+        self.check_interval = check_interval
+
+        self.idle = False
+        self.display_shape = None
+        self.skipped = 0
+        self.wakeups = 0
+        self.wall = {False: 0.0, True: 0.0}
+        self.cpu = {False: 0.0, True: 0.0}
+
+        self._last_hand = None
+        self._last_check = 0.0
+        self._previous = None
+        self._applied = False
+        self._active_settings = None
+        self._next_read = 0.0
+        self._last_wall = None
+        self._last_cpu = None
+
+    def before_read(self, cap):
+        """Call in the capturing thread before every read: applies the capture settings and idle rate"""
+        now = time.perf_counter()
+        self._account(now)
+        if self._applied != self.idle:
+            self._configure(cap, self.idle)
+        if self.idle:
+            if self._next_read > now:
+                time.sleep(self._next_read - now)
+            self._next_read = max(now, self._next_read) + 1.0 / self.idle_fps
+
+    def _configure(self, cap, idle):
+        if self._active_settings is None:
+            self._active_settings = (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
+                                     cap.get(cv2.CAP_PROP_FPS))
+        width, height, fps = self._active_settings
+        if idle:
+            height = round(height * self.idle_width / width) if width else 0
+            width, fps = self.idle_width, self.idle_fps
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        self._applied = idle
+        self._previous = None  # The new stream looks different; do not count that as motion
+
+    def _account(self, now):
+        cpu = time.process_time()
+        if self._last_wall is not None:
+            self.wall[self._applied] += now - self._last_wall
+            self.cpu[self._applied] += cpu - self._last_cpu
+        self._last_wall, self._last_cpu = now, cpu
+
+    def to_display(self, image, buffers=None):
+        """Scale an idle (low resolution) frame up to the size of the active frames"""
+        if not self.idle and not self._applied:
+            self.display_shape = image.shape
+        if self.display_shape is None or image.shape == self.display_shape:
+            return image
+        h, w = self.display_shape[:2]
+        dst = buffers.get('display', self.display_shape) if buffers is not None else None
+        return cv2.resize(image, (w, h), dst=dst, interpolation=cv2.INTER_LINEAR)
+
+    def should_infer(self, image, t):
+        """False when hand detection can be skipped for this frame"""
+        if not self.idle:
+            return True
+        if self._moved(image):
+            self.wake(t)
+            return True
+        if t - self._last_check >= self.check_interval:
+            self._last_check = t
+            return True
+        self.skipped += 1
+        return False
+
+    def _moved(self, image):
+        h, w = image.shape[:2]
+        small = cv2.resize(image, (self.sample_width, max(h * self.sample_width // w, 1)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        previous, self._previous = self._previous, gray
+        if previous is None or previous.shape != gray.shape:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(gray, previous) > self.motion_threshold)
+        return changed >= self.motion_fraction * gray.size
+
+    def observe(self, num_hands, t):
+        """Update the idle timer with the number of hands found on this frame"""
+        if self._last_hand is None:
+            self._last_hand = t
+        if num_hands:
+            if self.idle:
+                self.wake(t)
+            self._last_hand = t
+        elif not self.idle and t - self._last_hand >= self.idle_after:
+            self.idle = True
+            self._last_check = t
+            self._previous = None
+
+    def wake(self, t):
+        self.idle = False
+        self._last_hand = t  # Give the hand that caused the motion time to show up
+        self.wakeups += 1
+
+    def annotate(self, image):
+        if self.idle:
+            cv2.putText(image, "Idle - move a hand to wake", (10, image.shape[0] - 80),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 200, 255), 2)
+
+    def stats(self):
+        active_rate = self.cpu[False] / self.wall[False] if self.wall[False] > 0 else None
+        saved = self.wall[True] * active_rate - self.cpu[True] if active_rate is not None else None
+        return {
+            'idle_s': self.wall[True],
+            'active_s': self.wall[False],
+            'idle_cpu_s': self.cpu[True],
+            'active_cpu_s': self.cpu[False],
+            'skipped_frames': self.skipped,
+            'wakeups': self.wakeups,
+            'cpu_saved_s': saved,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Idle for {stats['idle_s']:.1f} s of {stats['idle_s'] + stats['active_s']:.1f} s, "
+              f"skipped inference on {stats['skipped_frames']} frames, woke {stats['wakeups']} times")
+        if stats['cpu_saved_s'] is not None and stats['idle_s'] > 0:
+            print(f"Idle CPU time {stats['idle_cpu_s']:.1f} s, about {stats['cpu_saved_s']:.1f} s less "
+                  f"than at the active rate")
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+
+from hand_detector import THUMB_TIP, INDEX_TIP
+
+
+class InferenceScheduler:
+    """Decides per frame whether HandDetector has to run MediaPipe at all.
+
+    While the hand is nearly still (for instance during the hover dwell) most
+    frames are skipped and the landmarks are extrapolated from the last two
+    inferences. Fast motion or a quickly changing pinch distance forces a full
+    run. With a budget set, inference time is paid from a credit that grows by
+    `budget` seconds per frame, which caps the average inference cost.
+    """
+
+    def __init__(self, max_skip=3, still_speed=0.15, pinch_speed=0.3, budget=None, low_res_width=None):
+        self.max_skip = max_skip
+        self.still_speed = still_speed  # Normalized units per second
+        self.pinch_speed = pinch_speed  # Thumb-index distance change per second
+        self.budget = budget
+        self.low_res_width = low_res_width
+
+        self.credit = 0.0
+        self.skipped = 0
+        self.inference_count = 0
+        self.skip_count = 0
+        self.inference_cost = 0.0
+
+        self._landmarks = None
+        self._t = None
+        self._velocity = None
+        self._pinch_rate = 0.0
+
+    def decide(self, num_hands):
+        """Return 'full', 'low' or 'skip' for the next frame"""
+        if self.budget is not None:
+            self.credit = min(self.credit + self.budget, self.budget * (self.max_skip + 1))
+            if self.credit < 0:
+                return 'skip'
+
+        if self._velocity is None or not num_hands:
+            return 'full'
+
+        speed = float(np.abs(self._velocity[..., :2]).max())
+        if speed > self.still_speed or self._pinch_rate > self.pinch_speed:
+            return 'full'
+        if self.skipped >= self.max_skip:
+            return 'low' if self.low_res_width else 'full'
+        return 'skip'
+
+    def process(self, detector, image, t, draw=True):
+        """Run or skip inference for one frame; landmarks end up in the detector either way"""
+        mode = self.decide(detector.num_hands)
+
+        if mode == 'skip':
+            self.skipped += 1
+            self.skip_count += 1
+            self._extrapolate(detector, t)
+            if draw:
+                detector.draw_hands(image)
+            return image
+
+        width = detector.inference_width
+        if mode == 'low':
+            detector.inference_width = min(width, self.low_res_width)
+        t0 = time.perf_counter()
+        try:
+            image = detector.find_hands(image, draw=draw)
+        finally:
+            detector.inference_width = width
+        cost = time.perf_counter() - t0
+
+        self.credit -= cost
+        self.inference_cost += 0.1 * (cost - self.inference_cost)
+        self.inference_count += 1
+        self.skipped = 0
+        self._observe(detector.get_landmark_array(), t)
+        return image
+
+    def _observe(self, landmarks, t):
+        if not len(landmarks):
+            self._landmarks = self._velocity = self._t = None
+            return
+
+        if self._landmarks is not None and self._landmarks.shape == landmarks.shape and t > self._t:
+            dt = t - self._t
+            self._velocity = (landmarks - self._landmarks) / dt
+            self._pinch_rate = abs(self._pinch_distance(landmarks) - self._pinch_distance(self._landmarks)) / dt
+        else:
+            self._velocity = None  # New track, motion unknown until the next inference
+
+        self._landmarks = landmarks.copy()
+        self._t = t
+
+    @staticmethod
+    def _pinch_distance(landmarks):
+        return float(np.linalg.norm(landmarks[:, THUMB_TIP, :2] - landmarks[:, INDEX_TIP, :2], axis=-1).max())
+
+    def _extrapolate(self, detector, t):
+        if self._velocity is None or not detector.num_hands:
+            return
+        detector.replace_landmarks(self._landmarks + self._velocity * (t - self._t))
+
+    def stats(self):
+        frames = self.inference_count + self.skip_count
+        return {
+            'inference_count': self.inference_count,
+            'skip_count': self.skip_count,
+            'inference_ratio': self.inference_count / frames if frames else 0.0,
+            'avg_inference_ms': self.inference_cost * 1000,
+        }
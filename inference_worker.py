@@ -0,0 +1,395 @@
+"""Hand detection in a child process, fed through shared memory.
+
+The UI process copies each frame into a FrameRing slot and wakes the worker;
+no frame is ever pickled. The worker always takes the newest frame, runs a
+normal HandDetector on it and publishes the landmarks, track ids and
+handedness in a ResultBlock together with the frame's sequence number.
+RemoteHandDetector wraps both ends behind the HandDetector interface, so the
+frame loop does not change. When the worker dies or stops responding it is
+started again, and the UI keeps using the last landmarks meanwhile.
+"""
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from hand_detector import HandDetector, NUM_LANDMARKS
+
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+
+def _align(offset, alignment=64):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class FrameRing:
+    """Fixed number of BGR frame slots in shared memory.
+
+    The writer fills slots round robin and never touches the newest one, so
+    the reader can copy it out. Every slot carries the sequence number of its
+    frame, set to -1 while it is being written; a reader that sees the number
+    change during its copy simply takes the newest frame again.
+    """
+
+    def __init__(self, slots=3, height=720, width=1280, name=None):
+        self.slots = slots
+        self.height = height
+        self.width = width
+        header_bytes = 8 * (1 + 3 * slots) + 8 * slots
+        self._frames_offset = _align(header_bytes)
+        self._slot_bytes = height * width * 3
+        size = self._frames_offset + slots * self._slot_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size if name is None else 0)
+
+        buf = self.shm.buf
+        self.latest = np.ndarray((1,), dtype=np.int64, buffer=buf)
+        self.slot_info = np.ndarray((slots, 3), dtype=np.int64, buffer=buf, offset=8)  # seq, height, width
+        self.capture_times = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=8 * (1 + 3 * slots))
+        self.frames = np.ndarray((slots, self._slot_bytes), dtype=np.uint8, buffer=buf,
+                                 offset=self._frames_offset)
+        if name is None:
+            self.latest[0] = 0
+            self.slot_info[:] = (-1, 0, 0)
+        self._seq = int(self.latest[0])
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, image, capture_time):
+        """Copy a frame into the next slot; frames larger than a slot are scaled down"""
+        self._seq += 1
+        seq = self._seq
+        slot = seq % self.slots
+        h, w = image.shape[:2]
+        if h > self.height or w > self.width:
+            scale = min(self.height / h, self.width / w)
+            h, w = max(int(h * scale), 1), max(int(w * scale), 1)
+            target = self.frames[slot, :h * w * 3].reshape(h, w, 3)
+            self.slot_info[slot, 0] = -1
+            cv2.resize(image, (w, h), dst=target, interpolation=cv2.INTER_AREA)
+        else:
+            target = self.frames[slot, :h * w * 3].reshape(h, w, 3)
+            self.slot_info[slot, 0] = -1
+            np.copyto(target, image)
+        self.capture_times[slot] = capture_time
+        self.slot_info[slot] = (seq, h, w)
+        self.latest[0] = seq
+        return seq
+
+    def read_latest(self, out, after=0):
+        """Copy the newest frame newer than `after` into `out`; returns (seq, capture_time, frame) or None"""
+        for _ in range(100):
+            seq = int(self.latest[0])
+            if seq <= after:
+                return None
+            slot = seq % self.slots
+            info_seq, h, w = self.slot_info[slot].tolist()
+            if info_seq != seq:
+                continue  # Overwritten in the meantime, take the newer one
+            size = h * w * 3
+            if out.size < size:
+                out = np.empty(size, dtype=np.uint8)
+            frame = out[:size].reshape(h, w, 3)
+            np.copyto(frame, self.frames[slot, :size].reshape(h, w, 3))
+            capture_time = float(self.capture_times[slot])
+            if int(self.slot_info[slot, 0]) == seq:
+                return seq, capture_time, frame
+        return None  # The writer died halfway through a frame
+
+    def close(self, unlink=False):
+        del self.latest, self.slot_info, self.capture_times, self.frames
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class ResultBlock:
+    """Landmarks of the newest processed frame in shared memory.
+
+    The writer makes `version` odd while it updates the block and even again
+    when done; a reader retries until it sees the same even version before
+    and after its copy.
+    """
+
+    # int64 header fields; WAKEUPS counts the wakeup messages the worker has received and
+    # INFERENCE_WIDTH is the width the UI asks the worker to run inference at
+    VERSION, FRAME_SEQ, NUM_HANDS, READY, STOP, WAKEUPS, INFERENCE_WIDTH = range(7)
+
+    def __init__(self, max_hands=1, name=None):
+        self.max_hands = max_hands
+        offsets = [0, 64, 64 + 3 * 8]  # header, timings, track ids
+        offsets.append(_align(offsets[2] + 4 * max_hands, 8))  # handedness
+        offsets.append(_align(offsets[3] + max_hands, 8))  # landmarks
+        size = offsets[4] + 4 * max_hands * NUM_LANDMARKS * 3
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size if name is None else 0)
+
+        buf = self.shm.buf
+        self.header = np.ndarray((8,), dtype=np.int64, buffer=buf, offset=offsets[0])
+        # Capture time, inference time and heartbeat
+        self.times = np.ndarray((3,), dtype=np.float64, buffer=buf, offset=offsets[1])
+        self.track_ids = np.ndarray((max_hands,), dtype=np.int32, buffer=buf, offset=offsets[2])
+        self.handedness = np.ndarray((max_hands,), dtype=np.int8, buffer=buf, offset=offsets[3])
+        self.landmarks = np.ndarray((max_hands, NUM_LANDMARKS, 3), dtype=np.float32, buffer=buf, offset=offsets[4])
+        self._scratch = None
+        if name is None:
+            self.header[:] = 0
+            self.times[:] = 0.0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, frame_seq, capture_time, inference_time, detector):
+        n = detector.num_hands
+        header = self.header
+        header[self.VERSION] += 1
+        header[self.FRAME_SEQ] = frame_seq
+        header[self.NUM_HANDS] = n
+        self.times[0] = capture_time
+        self.times[1] = inference_time
+        self.track_ids[:n] = detector.track_ids[:n]
+        self.handedness[:n] = detector.handedness[:n]
+        self.landmarks[:n] = detector.landmarks[:n]
+        header[self.VERSION] += 1
+
+    def heartbeat(self):
+        self.times[2] = time.monotonic()
+
+    def read_into(self, detector):
+        """Copy the newest landmarks into a detector's arrays; returns (frame_seq, inference_time) or None"""
+        if self._scratch is None:
+            self._scratch = (self.track_ids.copy(), self.handedness.copy(), self.landmarks.copy())
+        track_ids, handedness, landmarks = self._scratch
+        header = self.header
+        for _ in range(100):
+            version = int(header[self.VERSION])
+            if version % 2:
+                continue
+            frame_seq = int(header[self.FRAME_SEQ])
+            n = int(header[self.NUM_HANDS])
+            inference_time = float(self.times[1])
+            # Copy to scratch first: a torn read must not reach the arrays the UI is using
+            track_ids[:n] = self.track_ids[:n]
+            handedness[:n] = self.handedness[:n]
+            landmarks[:n] = self.landmarks[:n]
+            if int(header[self.VERSION]) == version:
+                detector.track_ids[:n] = track_ids[:n]
+                detector.handedness[:n] = handedness[:n]
+                detector.landmarks[:n] = landmarks[:n]
+                detector.num_hands = n
+                return frame_seq, inference_time
+        return None  # The writer died halfway through an update
+
+    def close(self, unlink=False):
+        del self.header, self.times, self.track_ids, self.handedness, self.landmarks
+        self._scratch = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker_main(frames_name, results_name, slots, height, width, max_hands, options, wakeup):
+    ring = FrameRing(slots, height, width, name=frames_name)
+    results = ResultBlock(max_hands, name=results_name)
+    try:
+        detector = HandDetector(max_hands=max_hands, **options)
+        detector.warm_up(width, height)
+        results.header[ResultBlock.READY] = 1
+        out = np.empty(height * width * 3, dtype=np.uint8)
+        last_seq = 0
+        parent = mp.parent_process()
+        while not results.header[ResultBlock.STOP]:
+            results.heartbeat()
+            if not wakeup.poll(0.1):
+                if not parent.is_alive():
+                    break
+                continue
+            # Any number of wakeups means the same: a new frame. Count them before reading the
+            # ring, so the UI only skips a wakeup while this one is still ahead of the read
+            received = 0
+            while wakeup.poll():
+                wakeup.recv_bytes()
+                received += 1
+            results.header[ResultBlock.WAKEUPS] += received
+            frame = ring.read_latest(out, last_seq)
+            if frame is None:
+                continue
+            last_seq, capture_time, image = frame
+            # The UI lowers the width per frame, e.g. for the scheduler's low resolution mode
+            width = int(results.header[ResultBlock.INFERENCE_WIDTH])
+            if width > 0:
+                detector.inference_width = width
+            t0 = time.perf_counter()
+            detector.find_hands(image, draw=False)
+            results.publish(last_seq, capture_time, time.perf_counter() - t0, detector)
+    finally:
+        ring.close()
+        results.close()
+
+
+class RemoteHandDetector(HandDetector):
+    """HandDetector whose inference runs in a child process.
+
+    find_hands() hands the frame to the worker and returns at once with the
+    landmarks of the newest frame the worker has finished, so the UI never
+    waits on MediaPipe. The landmark accessors are HandDetector's own.
+    """
+
+    def __init__(self, max_hands=1, width=1280, height=720, slots=3, stall_timeout=5.0,
+                 start_timeout=60.0, restart_interval=1.0, profiler=None, **options):
+        # Only the landmark state lives here; MediaPipe itself is loaded in the worker
+        self._init_landmarks(max_hands)
+        self.results = None
+        self.inference_width = options.get('inference_width', 1280)
+        self.profiler = profiler
+        self.options = options  # HandDetector arguments for the worker
+        self.stall_timeout = stall_timeout
+        self.start_timeout = start_timeout
+        self.restart_interval = restart_interval
+
+        self.ring = FrameRing(slots, height, width)
+        self.result_block = ResultBlock(max_hands)
+        self._context = mp.get_context('spawn')  # MediaPipe does not survive fork()
+        self._wakeup = None
+        self._wake_lock = threading.Lock()
+        self._wakeups_sent = 0
+        self.process = None
+        self.restarts = 0
+        self.result_seq = 0
+        self.frames_sent = 0
+        self.frames_processed = 0
+        self._started_at = 0.0
+        self._start()
+
+    def _start(self):
+        header = self.result_block.header
+        if header[ResultBlock.VERSION] % 2:
+            header[ResultBlock.VERSION] += 1  # The last worker died while publishing
+        header[ResultBlock.READY] = 0
+        header[ResultBlock.STOP] = 0
+        header[ResultBlock.WAKEUPS] = 0
+        header[ResultBlock.INFERENCE_WIDTH] = self.inference_width
+        self.result_block.times[2] = 0.0
+
+        # A pipe rather than a multiprocessing.Event: a worker killed inside Event.wait()
+        # can leave its lock held, and the next set() would hang the UI
+        with self._wake_lock:
+            if self._wakeup is not None:
+                self._wakeup.close()
+            reader, self._wakeup = self._context.Pipe(duplex=False)
+            self._wakeups_sent = 0
+        self.process = self._context.Process(
+            target=_worker_main, name="inference-worker", daemon=True,
+            args=(self.ring.name, self.result_block.name, self.ring.slots, self.ring.height, self.ring.width,
+                  self.max_hands, self.options, reader))
+        self.process.start()
+        reader.close()
+        self._started_at = time.monotonic()
+
+    def _wake(self):
+        # At most one wakeup is ever unread, so send_bytes cannot block on a full pipe
+        # (Connection has no non-blocking send that works on Windows too)
+        with self._wake_lock:
+            if self._wakeups_sent > self.result_block.header[ResultBlock.WAKEUPS]:
+                return  # The worker has not picked up the last one yet and will see this frame too
+            try:
+                self._wakeup.send_bytes(b'\0')
+                self._wakeups_sent += 1
+            except OSError:
+                pass  # Worker gone; the supervisor restarts it
+
+    @property
+    def ready(self):
+        return bool(self.result_block.header[ResultBlock.READY])
+
+    def wait_ready(self, timeout=None):
+        """Block until the worker has loaded the model, returns whether it did"""
+        deadline = time.monotonic() + (self.start_timeout if timeout is None else timeout)
+        while not self.ready:
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def warm_up(self, width=1280, height=720):
+        self.wait_ready()
+
+    def _supervise(self):
+        """Restart the worker if it died or stopped responding"""
+        now = time.monotonic()
+        if now - self._started_at < self.restart_interval:
+            return  # Do not restart a worker that fails right away in a tight loop
+        if self.process.is_alive():
+            if self.ready:
+                stalled = now - self.result_block.times[2] > self.stall_timeout
+            else:
+                stalled = now - self._started_at > self.start_timeout
+            if not stalled:
+                return
+            print("Inference worker stopped responding, restarting it")
+            self.process.kill()
+        else:
+            print(f"Inference worker exited with code {self.process.exitcode}, restarting it")
+        self.process.join(1.0)
+        self.restarts += 1
+        self._start()
+
+    def find_hands(self, image, draw=True):
+        t0 = time.perf_counter()
+        self._supervise()
+        self.result_block.header[ResultBlock.INFERENCE_WIDTH] = self.inference_width
+        self.ring.write(image, t0)
+        self._wake()
+        self.frames_sent += 1
+
+        # Without a new result this reloads the previous one: the last landmarks stay in use
+        frame_seq, inference_time = self.result_block.read_into(self) or (self.result_seq, 0.0)
+        self._px_shape = None
+        if frame_seq != self.result_seq:
+            self.frames_processed += 1
+            if self.profiler is not None:
+                self.profiler.record('worker_inference', inference_time)
+        if self.profiler is not None:
+            self.profiler.record('worker_handoff', time.perf_counter() - t0)
+        self.result_seq = frame_seq
+
+        if draw:
+            self.draw_hands(image)
+        return image
+
+    def draw_hands(self, image):
+        for hand in self.get_landmark_array(image).astype(np.int32).tolist():
+            points = [tuple(point[:2]) for point in hand]
+            for a, b in HAND_CONNECTIONS:
+                cv2.line(image, points[a], points[b], (255, 255, 255), 2)
+            for point in points:
+                cv2.circle(image, point, 4, (255, 255, 255), 2)
+                cv2.circle(image, point, 3, (0, 255, 0), 2)
+
+    def stats(self):
+        return {
+            'frames_sent': self.frames_sent,
+            'frames_processed': self.frames_processed,
+            'restarts': self.restarts,
+        }
+
+    def close(self):
+        self.result_block.header[ResultBlock.STOP] = 1
+        self._wake()
+        self.process.join(2.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        self._wakeup.close()
+        self.ring.close(unlink=True)
+        self.result_block.close(unlink=True)
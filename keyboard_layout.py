@@ -0,0 +1,151 @@
+from bisect import bisect_left
+
+import numpy as np
+
+# Relative widths of the keys that share a full-width special row
+SPECIAL_KEY_WEIGHTS = {
+    'SPACE': 0.5,
+    'CLEAR': 0.25,
+    'BACK': 0.25,
+    'DEL WORD': 0.25,
+    'UNDO': 0.25,
+    'LEFT': 0.25,
+    'RIGHT': 0.25
+}
+
+# Optional row of editing keys below the default special row
+EDIT_KEYS = ['DEL WORD', 'UNDO', 'LEFT', 'RIGHT']
+
+# Slots of the word suggestion row, which splits the full width evenly
+SUGGESTION_PREFIX = 'SUGGEST'
+
+
+def suggestion_keys(count):
+    return [f'{SUGGESTION_PREFIX}{i + 1}' for i in range(count)]
+
+
+def is_suggestion_key(key):
+    return key is not None and key.startswith(SUGGESTION_PREFIX)
+
+
+class KeyboardLayout:
+    """Key rectangles for one frame size, plus a vectorized hit test.
+
+    Rectangles are (x, y, width, height, special). A point hits a key when it
+    lies strictly inside its rectangle.
+    """
+
+    def __init__(self, keys, width, height, key_margin=8, margin=20):
+        self.keys = [list(row) for row in keys]
+        self.width = width
+        self.height = height
+        self.key_margin = key_margin
+        self.margin = margin
+
+        available_width = width - 2 * margin
+        available_height = int(height * 0.4)
+
+        max_row_keys = 10
+        key_size = min(
+            (available_width - (max_row_keys - 1) * key_margin) // max_row_keys,
+            available_height // 5,
+            (available_height - (len(self.keys) - 1) * key_margin) // max(len(self.keys), 1),
+            100
+        )
+        rows = max(len(self.keys), 1)
+        fit_size = min((height - 2 * margin - (rows - 1) * key_margin) // rows,
+                       (available_width - (max_row_keys - 1) * key_margin) // max_row_keys)
+        # Keys stay at least 50 px unless that would push them out of the frame
+        self.key_size = max(min(max(key_size, 50), fit_size), 1)
+        # With many rows the keyboard grows upwards so the last row still ends above the margin
+        block_height = rows * self.key_size + (rows - 1) * key_margin
+        self.start_y = max(min(height - available_height, height - block_height) - margin, 0)
+
+        self.rects = {}
+        self.labels = []
+        for row_idx, row in enumerate(self.keys):
+            y = self.start_y + row_idx * (self.key_size + key_margin)
+            for key, x, key_width, special in self._layout_row(row, available_width):
+                self.rects[key] = (x, y, key_width, self.key_size, special)
+                self.labels.append(key)
+
+        self._build_index()
+
+    def _layout_row(self, row, available_width):
+        total_margin = self.key_margin * (len(row) - 1)
+
+        if all(key in SPECIAL_KEY_WEIGHTS for key in row):
+            available_for_keys = available_width - total_margin
+            key_widths = [int(available_for_keys * SPECIAL_KEY_WEIGHTS[key]) for key in row]
+            special = True
+        elif all(is_suggestion_key(key) for key in row):
+            key_widths = [(available_width - total_margin) // len(row)] * len(row)
+            special = True
+        else:
+            key_widths = [self.key_size] * len(row)
+            special = False
+
+        total_width = sum(key_widths) + total_margin
+        x = self.margin + (available_width - total_width) // 2
+
+        for key, key_width in zip(row, key_widths):
+            yield key, x, key_width, special
+            x += key_width + self.key_margin
+
+    def _build_index(self):
+        rects = np.array([self.rects[key][:4] for key in self.labels], dtype=np.int64).reshape(-1, 4)
+        row_of_key = np.repeat(np.arange(len(self.keys)), [len(row) for row in self.keys])
+
+        self.key_x0 = rects[:, 0]
+        self.key_x1 = rects[:, 0] + rects[:, 2]
+        self.key_row = row_of_key
+
+        self.row_y0 = self.start_y + np.arange(len(self.keys), dtype=np.int64) * (self.key_size + self.key_margin)
+        self.row_y1 = self.row_y0 + self.key_size
+
+        # Keys are ordered by row then x, so one sorted array covers every row.
+        # Offsetting each row by more than the frame width keeps rows apart.
+        self._row_stride = int(max(self.width, self.key_x1.max(initial=0)) + 1) * 4
+        self._key_sort = row_of_key * self._row_stride + self.key_x0
+
+        # Plain-list copies for the single point path, where numpy call overhead dominates
+        self._row_y0_list = self.row_y0.tolist()
+        self._row_x0_lists = []
+        self._row_x1_lists = []
+        self._row_label_lists = []
+        for row_idx in range(len(self.keys)):
+            in_row = row_of_key == row_idx
+            self._row_x0_lists.append(self.key_x0[in_row].tolist())
+            self._row_x1_lists.append(self.key_x1[in_row].tolist())
+            self._row_label_lists.append([label for label, r in zip(self.labels, row_of_key) if r == row_idx])
+
+    def hit_test(self, points):
+        """Return the index into self.labels hit by each point, or -1"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        px = points[:, 0]
+        py = points[:, 1]
+
+        row = np.searchsorted(self.row_y0, py, side='left') - 1
+        in_row = (row >= 0) & (py < self.row_y1[np.clip(row, 0, None)])
+        row = np.clip(row, 0, None)
+
+        idx = np.searchsorted(self._key_sort, row * self._row_stride + px, side='left') - 1
+        idx_safe = np.clip(idx, 0, None)
+        hit = (in_row & (idx >= 0) & (self.key_row[idx_safe] == row)
+               & (px < self.key_x1[idx_safe]))
+        return np.where(hit, idx, -1)
+
+    def key_at(self, point):
+        px, py = point[0], point[1]
+        row = bisect_left(self._row_y0_list, py) - 1
+        if row < 0 or py >= self._row_y0_list[row] + self.key_size:
+            return None
+
+        x0s = self._row_x0_lists[row]
+        col = bisect_left(x0s, px) - 1
+        if col < 0 or px >= self._row_x1_lists[row][col]:
+            return None
+        return self._row_label_lists[row][col]
+
+    def keys_at(self, points):
+        return [self.labels[idx] if idx >= 0 else None for idx in self.hit_test(points)]
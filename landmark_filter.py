@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """One Euro filter applied elementwise to a landmark array.
+
+    Slow movements are smoothed hard (cutoff near min_cutoff) while fast ones
+    raise the cutoff by beta * speed, so jitter drops without adding lag when
+    the hand actually moves. Defaults suit normalized coordinates.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=50.0, d_cutoff=5.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = None
+        self.t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        if self.x is None or self.x.shape != x.shape:
+            self.x = np.array(x, dtype=np.float32)
+            self.dx = np.zeros_like(self.x)
+            self.t = t
+            return self.x
+
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+
+        dx = (x - self.x) / dt
+        self.dx += self._alpha(self.d_cutoff, dt) * (dx - self.dx)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        self.x += self._alpha(cutoff, dt) * (x - self.x)
+        self.t = t
+        return self.x
+
+    @property
+    def velocity(self):
+        return self.dx
+
+
+class ConstantVelocityKalmanFilter:
+    """Independent constant-velocity Kalman filters, one per coordinate.
+
+    process_noise is the white-acceleration spectral density and
+    measurement_noise the variance of a landmark measurement, both in
+    normalized units.
+    """
+
+    def __init__(self, process_noise=0.02, measurement_noise=4e-6):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = None
+        self.t = None
+
+    def __call__(self, z, t):
+        if self.x is None or self.x.shape != z.shape:
+            self.x = np.array(z, dtype=np.float32)
+            self.v = np.zeros_like(self.x)
+            self.p00 = np.full_like(self.x, self.r)
+            self.p01 = np.zeros_like(self.x)
+            self.p11 = np.full_like(self.x, 1.0)
+            self.t = t
+            return self.x
+
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        q = self.q
+
+        # Predict
+        self.x += self.v * dt
+        self.p00 += dt * (2 * self.p01 + dt * self.p11) + q * dt ** 3 / 3
+        self.p01 += dt * self.p11 + q * dt ** 2 / 2
+        self.p11 += q * dt
+
+        # Update
+        s = self.p00 + self.r
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        residual = z - self.x
+        self.x += k0 * residual
+        self.v += k1 * residual
+        self.p11 -= k1 * self.p01
+        self.p01 *= 1 - k0
+        self.p00 *= 1 - k0
+        self.t = t
+        return self.x
+
+    @property
+    def velocity(self):
+        return self.v
+
+
+FILTERS = {
+    'one-euro': OneEuroFilter,
+    'kalman': ConstantVelocityKalmanFilter,
+}
+
+
+class LandmarkSmoother:
+    """Filtering stage between HandDetector and VirtualKeyboard.
+
+    Filters all landmarks of all hands at once and optionally extrapolates them
+    forward by `prediction` seconds to hide pipeline latency. Pass
+    prediction='auto' to use the latency reported through observe_latency.
+
+    Extrapolating a still hand only amplifies the jitter left in the filter's
+    velocity, so the horizon is scaled per hand by its smoothed speed: nothing
+    is predicted below `still_speed` (normalized units per second) and the
+    full horizon from twice that.
+    """
+
+    def __init__(self, method='one-euro', prediction=0.0, max_prediction=0.1, reset_after=0.5,
+                 still_speed=0.1, speed_smoothing=0.1, **params):
+        self.filter = FILTERS[method](**params)
+        self.prediction = prediction
+        self.max_prediction = max_prediction
+        self.reset_after = reset_after
+        self.still_speed = still_speed
+        self.speed_smoothing = speed_smoothing  # Time constant of the hand velocity, seconds
+        self.latency = 0.0
+        self._last_t = None
+        self._hand_velocity = None
+
+    def observe_latency(self, seconds):
+        """Feed a measured capture-to-display latency, averaged for 'auto' prediction"""
+        self.latency += 0.1 * (seconds - self.latency)
+
+    def horizon(self):
+        horizon = self.latency if self.prediction == 'auto' else self.prediction
+        return min(max(horizon, 0.0), self.max_prediction)
+
+    def prediction_gain(self, dt):
+        """Share of the horizon to predict for each hand, from its smoothed speed"""
+        # Whole-hand motion: averaging the landmarks cancels most of their independent jitter
+        velocity = self.filter.velocity[:, :, :2].mean(axis=1)
+        if self._hand_velocity is None or self._hand_velocity.shape != velocity.shape or dt is None:
+            self._hand_velocity = velocity.copy()
+        elif dt > 0:
+            self._hand_velocity += dt / (self.speed_smoothing + dt) * (velocity - self._hand_velocity)
+        speed = np.linalg.norm(self._hand_velocity, axis=1)
+        return np.clip(speed / self.still_speed - 1.0, 0.0, 1.0)
+
+    def apply(self, landmarks, t):
+        """Return filtered (and predicted) landmarks for a (hands, 21, 3) array"""
+        if not len(landmarks):
+            self.filter.reset()
+            self._last_t = None
+            self._hand_velocity = None
+            return landmarks
+
+        dt = None if self._last_t is None else t - self._last_t
+        if dt is not None and dt > self.reset_after:
+            self.filter.reset()  # Hand was lost long enough to be a new track
+            self._hand_velocity = None
+            dt = None
+        self._last_t = t
+
+        filtered = self.filter(landmarks, t)
+        gain = self.prediction_gain(dt)
+        horizon = self.horizon()
+        if horizon > 0:
+            return filtered + self.filter.velocity * (horizon * gain)[:, None, None]
+        return filtered.copy()
+
+    def apply_to_detector(self, detector, t):
+        detector.replace_landmarks(self.apply(detector.get_landmark_array(), t))
@@ -1,122 +1,531 @@
+import time
+_LAUNCH_TIME = time.perf_counter()  # Start of the 'imports' startup phase
+
+import argparse
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+import numpy as np
 from hand_detector import HandDetector
 from virtual_keyboard import VirtualKeyboard
-import time
+from pipeline import PipelinedRunner
+from utils.metrics import Instrumentation, AllocationMeter
+from landmark_filter import FILTERS, LandmarkSmoother
+from inference_scheduler import InferenceScheduler
+from idle_mode import IdleMode
+from inference_worker import RemoteHandDetector
+from word_predictor import WordPredictor, DEFAULT_WORDS_PATH
+from swipe_decoder import SwipeDecoder
+from event_bus import EventBus, StdoutSink, FileSink, SocketSink, UinputSink
+from utils.startup import StartupTimer
+from utils.buffers import FramePool
+
+WINDOW_NAME = "Virtual Keyboard"
+
+
+def _release_probe(probe):
+    probe.result().release()
+
+
+def open_camera(indices=(0, 1)):
+    """Open the first working camera; all indices are probed at the same time"""
+    pool = ThreadPoolExecutor(max_workers=len(indices), thread_name_prefix="camera-probe")
+    probes = [pool.submit(cv2.VideoCapture, index) for index in indices]
+    pool.shutdown(wait=False)
+
+    cap = None
+    for index, probe in zip(indices, probes):
+        if cap is not None:
+            # Close slower probes once they finish instead of waiting for them
+            probe.add_done_callback(_release_probe)
+            continue
+        candidate = probe.result()
+        if candidate.isOpened():
+            cap = candidate
+        else:
+            candidate.release()
+            if index != indices[-1]:
+                print(f"Trying camera {index + 1}...")
+
+    if cap is None:
+        return None
 
-def main():
-    print("Initializing camera...")
-    
-    cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
-        print("Trying camera 1...")
-        cap = cv2.VideoCapture(1)
-        
-    if not cap.isOpened():
-        print("No camera available!")
-        return
-    
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
     cap.set(cv2.CAP_PROP_FPS, 30)
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    
-    print("Camera opened successfully!")
-    
-    detector = HandDetector(detection_confidence=0.8, tracking_confidence=0.8, max_hands=1)
-    keyboard = VirtualKeyboard()
-    
+    return cap
+
+
+def timed_phase(startup, name, function, *args):
+    with startup.phase(name):
+        return function(*args)
+
+
+def create_detector(max_hands, profiler, startup, buffers=None, worker_process=False):
+    with startup.phase('model_init'):
+        if worker_process:
+            # The model loads in the child process; warm_up below waits for it
+            detector = RemoteHandDetector(detection_confidence=0.8, tracking_confidence=0.8, max_hands=max_hands,
+                                          profiler=profiler)
+        else:
+            detector = HandDetector(detection_confidence=0.8, tracking_confidence=0.8, max_hands=max_hands,
+                                    profiler=profiler, buffers=buffers)
+    with startup.phase('warm_up'):
+        detector.warm_up()
+    return detector
+
+
+def show_warming_up(keyboard, camera, model, startup):
+    """Show the keyboard while the camera and model start, returns False if the user quits"""
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+    background = np.full((720, 1280, 3), 40, dtype=np.uint8)
+    first = True
+    while not (camera.done() and model.done()):
+        img = keyboard.draw_keyboard(background.copy())
+        status = "Warming up...  camera: {}  |  hand model: {}".format(
+            "ready" if camera.done() else "starting", "ready" if model.done() else "loading")
+        cv2.putText(img, status, (20, img.shape[0] // 2 - 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 220, 255), 2)
+        cv2.imshow(WINDOW_NAME, img)
+        if first:
+            startup.record('ui_shown', 0.0)
+            first = False
+        if not handle_window_key(keyboard):
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def report_first_frame(startup, loop_start):
+    startup.record('first_frame', loop_start)
+    startup.report()
+
+
+def close_detector(detector):
+    if not isinstance(detector, RemoteHandDetector):
+        return
+    stats = detector.stats()
+    print(f"Inference worker processed {stats['frames_processed']} of {stats['frames_sent']} frames, "
+          f"restarted {stats['restarts']} times")
+    detector.close()
+
+
+def draw_finger_overlay(img, finger_positions):
+    if not finger_positions:
+        return
+
+    if 'thumb_tip' in finger_positions:
+        thumb_pos = finger_positions['thumb_tip']
+        cv2.circle(img, thumb_pos, 15, (255, 0, 0), cv2.FILLED)
+        cv2.circle(img, thumb_pos, 20, (255, 255, 255), 2)
+
+    if 'index_tip' in finger_positions:
+        index_pos = finger_positions['index_tip']
+        cv2.circle(img, index_pos, 15, (0, 255, 0), cv2.FILLED)
+        cv2.circle(img, index_pos, 20, (255, 255, 255), 2)
+
+    # Draw connection line when close
+    if 'thumb_tip' in finger_positions and 'index_tip' in finger_positions:
+        thumb_pos = finger_positions['thumb_tip']
+        index_pos = finger_positions['index_tip']
+        distance = ((thumb_pos[0] - index_pos[0])**2 + (thumb_pos[1] - index_pos[1])**2)**0.5
+
+        if distance < 100:  # Show connection when fingers are close
+            color = (0, 255, 0) if distance < 50 else (0, 255, 255)
+            cv2.line(img, thumb_pos, index_pos, color, 3)
+            # Show distance
+            mid_point = ((thumb_pos[0] + index_pos[0])//2, (thumb_pos[1] + index_pos[1])//2)
+            cv2.putText(img, f"{int(distance)}", mid_point, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+
+def handle_window_key(keyboard=None):
+    """Poll the window for a key press, returns False when the user quits"""
+    key = cv2.waitKey(1) & 0xFF
+    if key == ord('q'):
+        return False
+    elif key == ord('c') and keyboard is not None:
+        keyboard.process_key_press('CLEAR')
+    elif key == ord('u') and keyboard is not None:  # Undo the last edit
+        keyboard.process_key_press('UNDO')
+    elif key == ord('x') and keyboard is not None:  # Delete the previous word
+        keyboard.process_key_press('DEL WORD')
+    elif key == ord('[') and keyboard is not None:  # Move the cursor
+        keyboard.process_key_press('LEFT')
+    elif key == ord(']') and keyboard is not None:
+        keyboard.process_key_press('RIGHT')
+    elif key == ord('f'):  # Toggle fullscreen
+        cv2.setWindowProperty(WINDOW_NAME, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    elif key == ord('w'):  # Windowed mode
+        cv2.setWindowProperty(WINDOW_NAME, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
+    return True
+
+
+def read_frame(cap, image=None, idle=None):
+    if idle is not None:
+        idle.before_read(cap)
+    return cap.read(image) if image is not None else cap.read()
+
+
+def detect_hands(detector, img, capture_time, profiler, smoother=None, scheduler=None, idle=None):
+    """Run (or schedule) hand detection, then the optional landmark filter"""
+    if idle is not None:
+        with profiler.section('motion'):
+            active = idle.should_infer(img, capture_time)
+        if not active:
+            return img
+
+    if scheduler is not None:
+        img = scheduler.process(detector, img, capture_time)
+    else:
+        img = detector.find_hands(img, draw=True)
+    if smoother is not None:
+        with profiler.section('filter'):
+            smoother.apply_to_detector(detector, capture_time)
+    if idle is not None:
+        idle.observe(detector.num_hands, capture_time)
+    return img
+
+
+def run_single_thread(cap, detector, keyboard, instrumentation, smoother=None, scheduler=None, startup=None,
+                      buffers=None, idle=None):
+    profiler = instrumentation.profiler
+    loop_start = startup.now() if startup is not None else None
     frame_count = 0
     fps_start_time = time.time()
     fps = 0
-    
-    print("Virtual Keyboard started!")
-    print("Instructions:")
-    print("1. Hover your index finger over a key")
-    print("2. Pinch thumb and index finger together to type")
-    print("3. Keys are larger and more responsive now!")
-    print("4. Press 'q' to quit")
-    
+    capture = None  # With buffers, every frame after the first is decoded into the same memory
+
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+    instrumentation.start()
+
     while True:
-        ret, img = cap.read()
-        
+        with profiler.section('capture'):
+            ret, img = read_frame(cap, capture, idle)
+        capture_time = time.perf_counter()
+
         if not ret or img is None:
             continue
-        
+        if buffers is not None and (capture is None or capture.shape != img.shape):
+            capture = buffers.get('capture', img.shape)
+
         frame_count += 1
-        
+
         # Calculate FPS
         if frame_count % 30 == 0:
             fps_end_time = time.time()
             fps = 30 / (fps_end_time - fps_start_time)
             fps_start_time = fps_end_time
-        
+
         try:
-            img = cv2.flip(img, 1)  # Mirror effect
-            
+            with profiler.section('flip'):
+                img = cv2.flip(img, 1, dst=img if buffers is not None else None)  # Mirror effect
+                if idle is not None:
+                    img = idle.to_display(img, buffers)
+
             # Detect hands with optimized settings
-            img = detector.find_hands(img, draw=True)
-            hand_positions = detector.get_hand_positions(img)
-            finger_positions = detector.get_finger_positions(img)
-            
-            img = keyboard.draw_keyboard(img)
-            
-            if finger_positions:
-                if 'thumb_tip' in finger_positions:
-                    thumb_pos = finger_positions['thumb_tip']
-                    cv2.circle(img, thumb_pos, 15, (255, 0, 0), cv2.FILLED)
-                    cv2.circle(img, thumb_pos, 20, (255, 255, 255), 2)
-                
-                if 'index_tip' in finger_positions:
-                    index_pos = finger_positions['index_tip']
-                    cv2.circle(img, index_pos, 15, (0, 255, 0), cv2.FILLED)
-                    cv2.circle(img, index_pos, 20, (255, 255, 255), 2)
-                
-                # Draw connection line when close
-                if 'thumb_tip' in finger_positions and 'index_tip' in finger_positions:
-                    thumb_pos = finger_positions['thumb_tip']
-                    index_pos = finger_positions['index_tip']
-                    distance = ((thumb_pos[0] - index_pos[0])**2 + (thumb_pos[1] - index_pos[1])**2)**0.5
-                    
-                    if distance < 100:  # Show connection when fingers are close
-                        color = (0, 255, 0) if distance < 50 else (0, 255, 255)
-                        cv2.line(img, thumb_pos, index_pos, color, 3)
-                        # Show distance
-                        mid_point = ((thumb_pos[0] + index_pos[0])//2, (thumb_pos[1] + index_pos[1])//2)
-                        cv2.putText(img, f"{int(distance)}", mid_point, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            # Check for typing
-            if hand_positions:
-                typed_key = keyboard.check_hover_and_pinch(hand_positions, img.shape)
-                if typed_key:
-                    print(f"Typed: {typed_key}")
-            
+            img = detect_hands(detector, img, capture_time, profiler, smoother, scheduler, idle)
+            with profiler.section('positions'):
+                landmarks_px = detector.get_landmark_array(img)
+                track_ids = detector.track_ids[:detector.num_hands]
+                finger_positions = detector.get_all_finger_positions(img)
+
+            with profiler.section('draw_keyboard'):
+                img = keyboard.draw_keyboard(img)
+                for hand_fingers in finger_positions.values():
+                    draw_finger_overlay(img, hand_fingers)
+
+            # Check for typing; typed keys are reported through the event bus
+            with profiler.section('hover_pinch'):
+                keyboard.update_hands(landmarks_px, track_ids, img.shape)
+
             # Show FPS and performance info
-            cv2.putText(img, f"FPS: {fps:.1f}", (10, img.shape[0] - 50), 
+            cv2.putText(img, f"FPS: {fps:.1f}", (10, img.shape[0] - 50),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            cv2.putText(img, f"Frame: {frame_count}", (10, img.shape[0] - 20), 
+
+            cv2.putText(img, f"Frame: {frame_count}", (10, img.shape[0] - 20),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
+            instrumentation.annotate(img)
+            if idle is not None:
+                idle.annotate(img)
+
             # Show window in fullscreen for better visibility
-            cv2.namedWindow("Virtual Keyboard", cv2.WINDOW_NORMAL)
-            cv2.imshow("Virtual Keyboard", img)
-            
+            with profiler.section('imshow'):
+                cv2.imshow(WINDOW_NAME, img)
+            if smoother is not None:
+                smoother.observe_latency(time.perf_counter() - capture_time)
+            if frame_count == 1 and startup is not None:
+                report_first_frame(startup, loop_start)
+
         except Exception as e:
             print(f"Error processing frame: {e}")
             continue
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
+
+        with profiler.section('wait_key'):
+            keep_running = handle_window_key(keyboard)
+        instrumentation.frame_done()
+        if not keep_running:
             break
-        elif key == ord('f'):  # Toggle fullscreen
-            cv2.setWindowProperty("Virtual Keyboard", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-        elif key == ord('w'):  # Windowed mode
-            cv2.setWindowProperty("Virtual Keyboard", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
-    
+
+
+def run_pipelined(cap, detector, keyboard, instrumentation, smoother=None, scheduler=None, startup=None,
+                  buffers=None, idle=None):
+    profiler = instrumentation.profiler
+    loop_start = startup.now() if startup is not None else None
+
+    def process_frame(packet):
+        # Every packet owns its captured frame, so with buffers it can be mirrored in place
+        with profiler.section('flip'):
+            img = cv2.flip(packet.image, 1, dst=packet.image if buffers is not None else None)  # Mirror effect
+            if idle is not None:
+                img = idle.to_display(img)  # A pool buffer could still be on screen, so allocate
+        img = detect_hands(detector, img, packet.capture_time, profiler, smoother, scheduler, idle)
+        packet.image = img
+        with profiler.section('positions'):
+            packet.landmarks_px = detector.get_landmark_array(img).copy()
+            packet.track_ids = detector.track_ids[:detector.num_hands].copy()
+            packet.finger_positions = detector.get_all_finger_positions(img)
+
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+    instrumentation.start()
+
+    with PipelinedRunner(functools.partial(read_frame, cap, None, idle), process_frame) as pipeline:
+        for packet in pipeline:
+            img = packet.image
+            try:
+                with profiler.section('draw_keyboard'):
+                    img = keyboard.draw_keyboard(img)
+                    for hand_fingers in packet.finger_positions.values():
+                        draw_finger_overlay(img, hand_fingers)
+
+                with profiler.section('hover_pinch'):
+                    pressed = keyboard.update_hands(packet.landmarks_px, packet.track_ids, img.shape)
+                if pressed:
+                    pipeline.record_keypress(packet)
+
+                stages = pipeline.stats.summary()['stages']
+                cv2.putText(img, "Cap {:.1f} | Inf {:.1f} | Ren {:.1f} FPS".format(
+                               stages['capture']['fps'], stages['inference']['fps'], stages['render']['fps']),
+                           (10, img.shape[0] - 50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                cv2.putText(img, f"Frame: {packet.seq}  Dropped: {pipeline.dropped_frames()}",
+                           (10, img.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                instrumentation.annotate(img)
+                if idle is not None:
+                    idle.annotate(img)
+
+                with profiler.section('imshow'):
+                    cv2.imshow(WINDOW_NAME, img)
+                if smoother is not None:
+                    smoother.observe_latency(time.perf_counter() - packet.capture_time)
+                if loop_start is not None:
+                    report_first_frame(startup, loop_start)
+                    loop_start = None
+
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                continue
+
+            with profiler.section('wait_key'):
+                keep_running = handle_window_key(keyboard)
+            instrumentation.frame_done()
+            if not keep_running:
+                break
+
+    print_pipeline_summary(pipeline)
+
+
+def print_pipeline_summary(pipeline):
+    summary = pipeline.stats.summary()
+    print("Pipeline throughput:")
+    for stage, stage_stats in summary['stages'].items():
+        print(f"  {stage:<10} {stage_stats['fps']:6.1f} FPS  {stage_stats['avg_ms']:6.1f} ms/frame")
+    print(f"  dropped    {pipeline.dropped_frames()} frames")
+    latency = summary['keypress_latency']
+    if latency:
+        print(f"Camera-to-keypress latency: avg {latency['avg_ms']:.1f} ms, "
+              f"max {latency['max_ms']:.1f} ms over {latency['count']} keys")
+
+
+def load_words(lexicon, swipe_decoder=None, layout=None):
+    """Read the word list, and build the swipe templates for a layout"""
+    lexicon.load()
+    print(f"Loaded {len(lexicon.words)} words from {lexicon.path}")
+    if swipe_decoder is not None:
+        swipe_decoder.templates(layout)
+
+
+def main(pipelined=False, instrumentation=None, smoother=None, scheduler=None, max_hands=1, predictor=None,
+         swipe_decoder=None, event_sinks=(), startup=None, buffers=None, idle=None, worker_process=False,
+         edit_keys=False):
+    startup = startup or StartupTimer()
+    instrumentation = instrumentation or Instrumentation()
+    events = EventBus([StdoutSink(show_hand=max_hands > 1)] + list(event_sinks))
+    keyboard = VirtualKeyboard(predictor=predictor, swipe_decoder=swipe_decoder, events=events,
+                               max_hands=max_hands, edit_keys=edit_keys)
+
+    # The camera and the hand model start at the same time while the keyboard is already on screen
+    print("Initializing camera and hand model...")
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+        camera = pool.submit(timed_phase, startup, 'camera', open_camera)
+        model = pool.submit(create_detector, max_hands, instrumentation.profiler, startup, buffers, worker_process)
+        keep_running = show_warming_up(keyboard, camera, model, startup)
+        cap = camera.result()
+        detector = model.result()
+
+    if cap is None:
+        print("No camera available!")
+        close_detector(detector)
+        events.close()
+        return
+    if not keep_running:
+        cap.release()
+        close_detector(detector)
+        events.close()
+        cv2.destroyAllWindows()
+        return
+
+    print("Camera opened successfully!")
+
+    if swipe_decoder is not None:
+        # Build the swipe templates in the background so neither startup nor the first swipe waits
+        layout = keyboard.get_layout(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        threading.Thread(target=load_words, args=(swipe_decoder.predictor, swipe_decoder, layout),
+                         name="swipe-templates", daemon=True).start()
+    elif predictor is not None:
+        # Read the word list in the background so neither startup nor the first key waits
+        threading.Thread(target=load_words, args=(predictor,), name="word-list", daemon=True).start()
+
+    print("Virtual Keyboard started!")
+    print("Instructions:")
+    print("1. Hover your index finger over a key")
+    print("2. Pinch thumb and index finger together to type")
+    print("3. Keys are larger and more responsive now!")
+    print("4. Press 'q' to quit")
+
+    try:
+        if pipelined:
+            run_pipelined(cap, detector, keyboard, instrumentation, smoother, scheduler, startup, buffers, idle)
+        else:
+            run_single_thread(cap, detector, keyboard, instrumentation, smoother, scheduler, startup, buffers,
+                              idle)
+    finally:
+        instrumentation.close()
+        close_detector(detector)
+        events.close()
+
+    if events.dropped:
+        print(f"Event bus dropped {events.dropped} events")
+
+    if scheduler is not None:
+        stats = scheduler.stats()
+        print(f"Inference ran on {stats['inference_count']} frames, skipped {stats['skip_count']} "
+              f"({stats['inference_ratio'] * 100:.0f}% run, {stats['avg_inference_ms']:.1f} ms each)")
+
+    if idle is not None:
+        idle.report()
+
     cap.release()
     cv2.destroyAllWindows()
     print("Virtual Keyboard closed.")
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hand gesture virtual keyboard")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture, inference and rendering on separate threads")
+    parser.add_argument("--hands", type=int, default=1, metavar="N",
+                        help="number of hands to track; each hand types into its own text")
+    parser.add_argument("--suggest", action="store_true",
+                        help="show word completions as a row of selectable keys")
+    parser.add_argument("--words", metavar="PATH",
+                        help="word frequency list for --suggest and --swipe ('word count' per line)")
+    parser.add_argument("--swipe", action="store_true",
+                        help="type whole words by dragging a held pinch across the letters")
+    parser.add_argument("--edit-keys", action="store_true",
+                        help="add a row with DEL WORD, UNDO and cursor LEFT/RIGHT keys")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=None,
+                        help="smooth landmarks before hover/pinch detection")
+    parser.add_argument("--predict", default="0", metavar="SECONDS|auto",
+                        help="extrapolate filtered landmarks forward; 'auto' uses the measured latency")
+    parser.add_argument("--schedule", action="store_true",
+                        help="skip inference while the hand is still and extrapolate landmarks")
+    parser.add_argument("--max-skip", type=int, default=3, metavar="N",
+                        help="most consecutive frames to skip while the hand is still")
+    parser.add_argument("--inference-budget", type=float, metavar="MS",
+                        help="average inference time allowed per frame, in milliseconds")
+    parser.add_argument("--low-res-width", type=int, metavar="PIXELS",
+                        help="inference width for the periodic refresh of a still hand")
+    parser.add_argument("--worker-process", action="store_true",
+                        help="run hand detection in a child process fed through shared memory")
+    parser.add_argument("--idle-after", type=float, metavar="SECONDS",
+                        help="after this long without a hand, run inference only on motion and slow the camera")
+    parser.add_argument("--idle-fps", type=float, default=5.0, metavar="FPS",
+                        help="capture rate while idle")
+    parser.add_argument("--idle-width", type=int, default=640, metavar="PIXELS",
+                        help="capture width while idle")
+    parser.add_argument("--events-file", metavar="PATH",
+                        help="append key, hover and pinch events to a JSON lines file")
+    parser.add_argument("--events-socket", metavar="ADDRESS",
+                        help="stream events as JSON lines to a UNIX socket path or TCP host:port")
+    parser.add_argument("--uinput", action="store_true",
+                        help="type keys into the OS through a virtual keyboard device (Linux, needs evdev)")
+    parser.add_argument("--reuse-buffers", action="store_true",
+                        help="capture, mirror, resize and convert frames into preallocated buffers")
+    parser.add_argument("--alloc-stats", action="store_true",
+                        help="measure memory allocated per frame with tracemalloc (slows Python down)")
+    parser.add_argument("--stats", action="store_true",
+                        help="show per-stage p50/p95/p99 timings on screen")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="periodically export stage timings (.csv appends rows, otherwise JSON)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve stage timings at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, metavar="SECONDS")
+    parser.add_argument("--profile-frames", type=int, default=0, metavar="N",
+                        help="run cProfile on the UI thread for the first N frames")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="save the cProfile stats here instead of printing them")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    startup = StartupTimer(t0=_LAUNCH_TIME)
+    startup.record('imports', 0.0)
+    args = parse_args()
+    buffers = FramePool() if args.reuse_buffers else None
+    instrumentation = Instrumentation(
+        show_stats=args.stats,
+        metrics_file=args.metrics_file,
+        metrics_port=args.metrics_port,
+        metrics_interval=args.metrics_interval,
+        profile_frames=args.profile_frames,
+        profile_output=args.profile_output,
+        allocations=AllocationMeter(pool=buffers) if args.alloc_stats else None,
+    )
+    smoother = None
+    if args.filter:
+        prediction = args.predict if args.predict == 'auto' else float(args.predict)
+        smoother = LandmarkSmoother(args.filter, prediction=prediction)
+    scheduler = None
+    if args.schedule or args.inference_budget:
+        budget = args.inference_budget / 1000 if args.inference_budget else None
+        scheduler = InferenceScheduler(max_skip=args.max_skip, budget=budget, low_res_width=args.low_res_width)
+    idle = None
+    if args.idle_after is not None:
+        idle = IdleMode(idle_after=args.idle_after, idle_fps=args.idle_fps, idle_width=args.idle_width)
+    lexicon = WordPredictor(args.words or DEFAULT_WORDS_PATH)
+    predictor = lexicon if args.suggest else None
+    swipe_decoder = SwipeDecoder(lexicon) if args.swipe else None
+    event_sinks = []
+    if args.events_file:
+        event_sinks.append(FileSink(args.events_file))
+    if args.events_socket:
+        event_sinks.append(SocketSink(args.events_socket))
+    if args.uinput:
+        try:
+            event_sinks.append(UinputSink())
+        except (ImportError, OSError) as e:
+            print(f"Virtual keyboard device unavailable: {e}")
+    main(pipelined=args.pipelined, instrumentation=instrumentation, smoother=smoother, scheduler=scheduler,
+         max_hands=args.hands, predictor=predictor, swipe_decoder=swipe_decoder, event_sinks=event_sinks,
+         startup=startup, buffers=buffers, idle=idle, worker_process=args.worker_process,
+         edit_keys=args.edit_keys)
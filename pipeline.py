@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestSlot:
+    """Single-item handoff where a newer item replaces an unread one"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class FramePacket:
+    def __init__(self, seq, image, capture_time):
+        self.seq = seq
+        self.image = image
+        self.capture_time = capture_time
+        self.landmarks_px = ()
+        self.track_ids = ()
+        self.finger_positions = {}
+
+
+class PipelineStats:
+    def __init__(self, stages):
+        self._lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.counts = {stage: 0 for stage in stages}
+        self.busy = {stage: 0.0 for stage in stages}
+        self.latencies = deque(maxlen=200)
+
+    def record(self, stage, duration):
+        with self._lock:
+            self.counts[stage] += 1
+            self.busy[stage] += duration
+
+    def record_latency(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def summary(self):
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.start_time, 1e-6)
+            stages = {}
+            for stage, count in self.counts.items():
+                stages[stage] = {
+                    'fps': count / elapsed,
+                    'avg_ms': self.busy[stage] / count * 1000 if count else 0.0,
+                }
+            latencies = sorted(self.latencies)
+
+        latency = None
+        if latencies:
+            latency = {
+                'count': len(latencies),
+                'avg_ms': sum(latencies) / len(latencies) * 1000,
+                'max_ms': latencies[-1] * 1000,
+            }
+        return {'stages': stages, 'keypress_latency': latency}
+
+
+class PipelinedRunner:
+    """Runs capture and inference on worker threads and yields results to the UI thread.
+
+    Stages are connected by LatestSlot handoffs, so a slow stage never makes
+    an earlier one wait and stale frames are dropped rather than queued.
+    """
+
+    def __init__(self, read_frame, process_frame):
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self.stats = PipelineStats(['capture', 'inference', 'render'])
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _capture_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ret, img = self.read_frame()
+            t1 = time.perf_counter()
+            if not ret or img is None:
+                continue
+
+            seq += 1
+            self.stats.record('capture', t1 - t0)
+            self.frames.put(FramePacket(seq, img, t1))
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            packet = self.frames.get(timeout=0.1)
+            if packet is None:
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                self.process_frame(packet)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                continue
+            self.stats.record('inference', time.perf_counter() - t0)
+            self.results.put(packet)
+
+    def __iter__(self):
+        while not self._stop.is_set():
+            packet = self.results.get(timeout=0.1)
+            if packet is None:
+                continue
+
+            t0 = time.perf_counter()
+            yield packet
+            self.stats.record('render', time.perf_counter() - t0)
+
+    def record_keypress(self, packet):
+        """Record camera-to-keypress latency for a packet that produced a key"""
+        self.stats.record_latency(time.perf_counter() - packet.capture_time)
+
+    def dropped_frames(self):
+        return self.frames.dropped + self.results.dropped
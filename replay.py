@@ -0,0 +1,279 @@
+"""Headless replay of recorded sessions through the keyboard pipeline.
+
+Frames come from a video file or an image sequence (run through HandDetector),
+or from a pre-extracted landmark stream (JSON lines, one frame per line:
+{"t": seconds, "width": w, "height": h, "hands": [[[x, y, z] * 21], ...],
+"track_ids": [id, ...]} with normalized coordinates; streams without track
+ids number the hands of each frame from 0). The keyboard runs on a replay clock driven by
+frame timestamps, so results do not depend on how fast the machine is.
+
+    python replay.py session.mp4 --output result.json
+    python replay.py session.mp4 --dump-landmarks session.jsonl
+    python replay.py session.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from hand_detector import NUM_LANDMARKS
+from virtual_keyboard import VirtualKeyboard
+from word_predictor import WordPredictor, DEFAULT_WORDS_PATH
+from swipe_decoder import SwipeDecoder
+
+
+class ReplayClock:
+    """Clock set from frame timestamps instead of wall time"""
+
+    def __init__(self, start=1.0):
+        # The keyboard treats a hover start time of 0 as unset, so start later
+        self.start = start
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def set(self, t):
+        self.now = self.start + t
+
+
+class StageTimes:
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        summary = {}
+        for stage, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            summary[stage] = {
+                'count': len(ms),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+            }
+        return summary
+
+
+def iter_video(path, fps=None):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video {path}")
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index / fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def iter_images(pattern, fps=30.0):
+    if os.path.isdir(pattern):
+        paths = sorted(p for p in glob.glob(os.path.join(pattern, '*'))
+                       if p.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')))
+    else:
+        paths = sorted(glob.glob(pattern))
+    for index, path in enumerate(paths):
+        frame = cv2.imread(path)
+        if frame is None:
+            raise IOError(f"Cannot read image {path}")
+        yield index / fps, frame
+
+
+def iter_landmarks(path, fps=30.0):
+    with open(path) as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            hands = np.array(record.get('hands', []), dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+            track_ids = np.array(record.get('track_ids', range(len(hands))), dtype=np.int32)
+            yield record.get('t', index / fps), (record['height'], record['width']), hands, track_ids
+
+
+def _timed_next(iterator, stages, stage):
+    t0 = time.perf_counter()
+    item = next(iterator, None)
+    stages.add(stage, time.perf_counter() - t0)
+    return item
+
+
+def _step_keyboard(keyboard, landmarks_px, track_ids, image, stages, typed, t, draw):
+    t0 = time.perf_counter()
+    for _, typed_key in keyboard.update_hands(landmarks_px, track_ids, image.shape):
+        if typed_key:
+            typed.append({'t': round(t, 4), 'key': typed_key})
+    t1 = time.perf_counter()
+    stages.add('keyboard_logic', t1 - t0)
+
+    if draw:
+        keyboard.draw_keyboard(image)
+        stages.add('draw', time.perf_counter() - t1)
+
+
+def replay_frames(frames, detector, keyboard, clock, flip=True, draw=True, landmark_log=None):
+    stages = StageTimes()
+    typed = []
+    frame_count = 0
+    frames = iter(frames)
+
+    while True:
+        item = _timed_next(frames, stages, 'decode')
+        if item is None:
+            break
+        t, frame = item
+        clock.set(t)
+        frame_count += 1
+
+        t0 = time.perf_counter()
+        if flip:
+            frame = cv2.flip(frame, 1)
+        t1 = time.perf_counter()
+        frame = detector.find_hands(frame, draw=draw)
+        t2 = time.perf_counter()
+        landmarks_px = detector.get_landmark_array(frame)
+        track_ids = detector.track_ids[:detector.num_hands]
+        t3 = time.perf_counter()
+        stages.add('flip', t1 - t0)
+        stages.add('inference', t2 - t1)
+        stages.add('landmarks', t3 - t2)
+
+        if landmark_log is not None:
+            h, w = frame.shape[:2]
+            landmark_log.write(json.dumps({
+                't': round(t, 6), 'width': w, 'height': h,
+                'hands': np.round(detector.get_landmark_array(), 6).tolist(),
+                'track_ids': track_ids.tolist(),
+            }) + "\n")
+
+        _step_keyboard(keyboard, landmarks_px, track_ids, frame, stages, typed, t, draw)
+
+    return frame_count, stages, typed
+
+
+def replay_landmarks(stream, keyboard, clock, draw=True):
+    stages = StageTimes()
+    typed = []
+    frame_count = 0
+    canvas = None
+    stream = iter(stream)
+
+    while True:
+        item = _timed_next(stream, stages, 'decode')
+        if item is None:
+            break
+        t, shape, hands, track_ids = item
+        clock.set(t)
+        frame_count += 1
+
+        t0 = time.perf_counter()
+        if canvas is None or canvas.shape[:2] != tuple(shape):
+            canvas = np.zeros((shape[0], shape[1], 3), dtype=np.uint8)
+        elif draw:
+            canvas.fill(0)
+        landmarks_px = hands * np.array((shape[1], shape[0], shape[1]), dtype=np.float32)
+        stages.add('landmarks', time.perf_counter() - t0)
+
+        _step_keyboard(keyboard, landmarks_px, track_ids, canvas, stages, typed, t, draw)
+
+    return frame_count, stages, typed
+
+
+def run_replay(source, fps=None, flip=True, draw=True, dump_landmarks=None,
+               detection_confidence=0.8, tracking_confidence=0.8, max_hands=1,
+               suggest=False, swipe=False, words=DEFAULT_WORDS_PATH):
+    """Replay a source and return the result summary as a dict"""
+    clock = ReplayClock()
+    lexicon = WordPredictor(words)
+    keyboard = VirtualKeyboard(clock=clock, predictor=lexicon if suggest else None,
+                               swipe_decoder=SwipeDecoder(lexicon) if swipe else None, max_hands=max_hands)
+
+    start = time.perf_counter()
+    if source.endswith(('.jsonl', '.ndjson')):
+        kind = 'landmarks'
+        frame_count, stages, typed = replay_landmarks(iter_landmarks(source, fps or 30.0),
+                                                      keyboard, clock, draw=draw)
+    else:
+        from hand_detector import HandDetector
+
+        # Static mode would reset tracking for every frame of a continuous recording
+        detector = HandDetector(detection_confidence=detection_confidence,
+                                tracking_confidence=tracking_confidence, max_hands=max_hands)
+        if os.path.isdir(source) or any(c in source for c in '*?['):
+            kind = 'images'
+            frames = iter_images(source, fps or 30.0)
+        else:
+            kind = 'video'
+            frames = iter_video(source, fps)
+
+        landmark_log = open(dump_landmarks, 'w') if dump_landmarks else None
+        try:
+            frame_count, stages, typed = replay_frames(frames, detector, keyboard, clock, flip=flip,
+                                                       draw=draw, landmark_log=landmark_log)
+        finally:
+            if landmark_log is not None:
+                landmark_log.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'source': source,
+        'kind': kind,
+        'frames': frame_count,
+        'elapsed_s': elapsed,
+        'fps': frame_count / elapsed if elapsed > 0 else 0.0,
+        'text': keyboard.text,
+        'hands': {str(session.slot + 1): session.text for session in keyboard.live_sessions()},
+        'keys': typed,
+        'stages': stages.summary(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session without camera or display")
+    parser.add_argument("source", help="video file, image directory/glob, or landmark .jsonl stream")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="timestamp rate for sources without one (default: video rate or 30)")
+    parser.add_argument("--no-flip", action="store_true",
+                        help="do not mirror frames (use for recordings that are already mirrored)")
+    parser.add_argument("--no-draw", action="store_true", help="skip keyboard and landmark drawing")
+    parser.add_argument("--dump-landmarks", metavar="PATH",
+                        help="write the detected landmarks as a .jsonl stream for later replays")
+    parser.add_argument("--max-hands", type=int, default=1)
+    parser.add_argument("--suggest", action="store_true", help="add the word suggestion row to the layout")
+    parser.add_argument("--swipe", action="store_true", help="decode held-pinch strokes as swiped words")
+    parser.add_argument("--words", metavar="PATH", default=DEFAULT_WORDS_PATH,
+                        help="word frequency list for --suggest and --swipe")
+    parser.add_argument("--output", "-o", metavar="PATH", help="write the JSON result here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run_replay(args.source, fps=args.fps, flip=not args.no_flip, draw=not args.no_draw,
+                        dump_landmarks=args.dump_landmarks, max_hands=args.max_hands,
+                        suggest=args.suggest, swipe=args.swipe, words=args.words)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Headless keyboard server for several camera streams at once.
+
+Every stream runs in a worker process with its own HandDetector (and so its
+own MediaPipe Hands instance) and VirtualKeyboard. Streams are independent,
+so throughput grows with the number of worker processes until the cores run
+out. Key events come back to the server process, are printed with the stream
+name and can be forwarded to the event sinks.
+
+Stream specs, optionally prefixed with "name=":
+
+    session.mp4, frames/, 'frames/*.png'   recorded files, timed by frame rate
+    unix:/tmp/kiosk1.sock                  listen on a UNIX socket for one sender
+    tcp:127.0.0.1:9001                     listen on a TCP port for one sender
+    pipe:/tmp/kiosk1.fifo                  read from a named pipe
+
+Live senders write each frame as a FRAME_HEADER (payload size, width, height)
+followed by the payload: raw BGR pixels when width and height are set, or an
+encoded image such as JPEG when both are 0 (see pack_frame).
+
+    python server.py kiosk1=tcp:127.0.0.1:9001 kiosk2=tcp:127.0.0.1:9002
+    python server.py a.mp4 b.mp4 --workers 2 --output results.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+
+from event_bus import EventBus, FileSink, SocketSink
+
+FRAME_HEADER = struct.Struct('!IHH')
+LIVE_PREFIXES = ('unix:', 'tcp:', 'pipe:')
+
+_events_queue = None
+
+
+def pack_frame(image, encoding='.jpg'):
+    """Serialize a BGR frame for a live stream; encoding=None sends raw pixels"""
+    if encoding is None:
+        h, w = image.shape[:2]
+        payload = np.ascontiguousarray(image, dtype=np.uint8).tobytes()
+        return FRAME_HEADER.pack(len(payload), w, h) + payload
+    ok, encoded = cv2.imencode(encoding, image)
+    if not ok:
+        raise ValueError(f"Cannot encode frame as {encoding}")
+    return FRAME_HEADER.pack(len(encoded), 0, 0) + encoded.tobytes()
+
+
+def _read_exact(stream, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def iter_framed(stream):
+    """Yield (t, frame) from a binary stream of FRAME_HEADER framed images"""
+    start = time.monotonic()
+    while True:
+        header = _read_exact(stream, FRAME_HEADER.size)
+        if header is None:
+            return
+        size, w, h = FRAME_HEADER.unpack(header)
+        payload = _read_exact(stream, size)
+        if payload is None:
+            return
+        if w and h:
+            frame = np.frombuffer(payload, dtype=np.uint8).reshape(h, w, 3)
+        else:
+            frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                print("Skipping undecodable frame")
+                continue
+        yield time.monotonic() - start, frame
+
+
+def _iter_socket(spec):
+    if spec.startswith('unix:'):
+        path = spec[5:]
+        if os.path.exists(path):
+            os.remove(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+    else:
+        host, port = spec[4:].rsplit(':', 1)
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host or '127.0.0.1', int(port)))
+    server.listen(1)
+    try:
+        conn, _ = server.accept()
+        with conn, conn.makefile('rb') as stream:
+            yield from iter_framed(stream)
+    finally:
+        server.close()
+
+
+def open_source(spec, fps=None):
+    """Return a (t, frame) iterator for a stream spec and whether it is live"""
+    if spec.startswith(('unix:', 'tcp:')):
+        return _iter_socket(spec), True
+    if spec.startswith('pipe:'):
+        def frames():
+            with open(spec[5:], 'rb') as stream:
+                yield from iter_framed(stream)
+        return frames(), True
+
+    from replay import iter_images, iter_video
+    if os.path.isdir(spec) or any(c in spec for c in '*?['):
+        return iter_images(spec, fps or 30.0), False
+    return iter_video(spec, fps), False
+
+
+class QueueEvents:
+    """EventBus stand-in for workers: forwards events to the server process.
+
+    put_nowait never blocks the frame loop; when the server falls behind the
+    event is dropped and counted.
+    """
+
+    def __init__(self, stream, events_queue):
+        self.stream = stream
+        self.queue = events_queue
+        self.dropped = 0
+
+    def emit(self, event_type, **fields):
+        fields['type'] = event_type
+        fields['stream'] = self.stream
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _init_worker(events_queue):
+    global _events_queue
+    _events_queue = events_queue
+
+
+def run_stream(name, spec, max_hands=1, flip=True, fps=None):
+    """Worker entry point: run one stream to its end and return its summary"""
+    from hand_detector import HandDetector
+    from replay import ReplayClock
+    from virtual_keyboard import VirtualKeyboard
+
+    frames, live = open_source(spec, fps)
+    # Recorded streams run on their own timestamps, live ones on wall time
+    clock = time.monotonic if live else ReplayClock()
+    events = QueueEvents(name, _events_queue) if _events_queue is not None else None
+    keyboard = VirtualKeyboard(clock=clock, events=events, max_hands=max_hands)
+    detector = HandDetector(detection_confidence=0.8, tracking_confidence=0.8, max_hands=max_hands)
+
+    frame_count = 0
+    start = time.perf_counter()
+    for t, frame in frames:
+        if not live:
+            clock.set(t)
+        if flip:
+            frame = cv2.flip(frame, 1)
+        detector.find_hands(frame, draw=False)
+        landmarks_px = detector.get_landmark_array(frame)
+        keyboard.update_hands(landmarks_px, detector.track_ids[:detector.num_hands], frame.shape)
+        frame_count += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'stream': name,
+        'source': spec,
+        'frames': frame_count,
+        'elapsed_s': elapsed,
+        'fps': frame_count / elapsed if elapsed > 0 else 0.0,
+        'text': keyboard.text,
+        'hands': {str(session.slot + 1): session.text for session in keyboard.live_sessions()},
+        'dropped_events': events.dropped if events is not None else 0,
+    }
+
+
+def parse_stream(arg):
+    name, sep, spec = arg.partition('=')
+    if not sep or name.startswith(LIVE_PREFIXES) or os.sep in name:
+        return arg, arg
+    return name, spec
+
+
+def serve(streams, workers=None, max_hands=1, flip=True, fps=None, event_sinks=(), quiet=False):
+    """Run (name, spec) streams on a process pool, returns the per-stream summaries"""
+    workers = workers or min(len(streams), os.cpu_count() or 1)
+    context = mp.get_context('spawn')  # MediaPipe does not survive fork()
+    events_queue = context.Queue(maxsize=10000)
+    bus = EventBus(event_sinks) if event_sinks else None
+
+    def drain(timeout):
+        try:
+            event = events_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            if event['type'] == 'key' and event.get('text') and not quiet:
+                print(f"[{event['stream']}] Typed: {event['text']}")
+            if bus is not None:
+                bus.emit(event.pop('type'), **event)
+            try:
+                event = events_queue.get_nowait()
+            except queue.Empty:
+                return
+
+    results = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(events_queue,)) as pool:
+            pending = {pool.submit(run_stream, name, spec, max_hands, flip, fps): name for name, spec in streams}
+            if not quiet:
+                print(f"Serving {len(streams)} streams on {workers} worker processes")
+            while pending:
+                drain(0.05)
+                done, _ = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        print(f"Stream {name} failed: {e}")
+                        results.append({'stream': name, 'error': str(e)})
+        drain(0.1)
+    finally:
+        if bus is not None:
+            bus.close()
+
+    elapsed = time.perf_counter() - start
+    total_frames = sum(result.get('frames', 0) for result in results)
+    return {
+        'streams': results,
+        'workers': workers,
+        'elapsed_s': elapsed,
+        'total_frames': total_frames,
+        'total_fps': total_frames / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless keyboard server for several frame streams")
+    parser.add_argument("streams", nargs="+", metavar="[NAME=]SPEC",
+                        help="video, image directory/glob, unix:PATH, tcp:HOST:PORT or pipe:PATH")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="worker processes (default: one per stream, up to the CPU count)")
+    parser.add_argument("--hands", type=int, default=1, metavar="N", help="hands tracked per stream")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="timestamp rate for recorded sources without one")
+    parser.add_argument("--no-flip", action="store_true",
+                        help="do not mirror frames (use for streams that are already mirrored)")
+    parser.add_argument("--events-file", metavar="PATH", help="append every stream's events to a JSON lines file")
+    parser.add_argument("--events-socket", metavar="ADDRESS",
+                        help="stream events as JSON lines to a UNIX socket path or TCP host:port")
+    parser.add_argument("--output", "-o", metavar="PATH", help="write the JSON summary here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sinks = []
+    if args.events_file:
+        sinks.append(FileSink(args.events_file))
+    if args.events_socket:
+        sinks.append(SocketSink(args.events_socket))
+
+    summary = serve([parse_stream(arg) for arg in args.streams], workers=args.workers,
+                    max_hands=args.hands, flip=not args.no_flip, fps=args.fps, event_sinks=sinks)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
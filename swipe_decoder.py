@@ -0,0 +1,131 @@
+import numpy as np
+
+
+def resample_paths(points, lengths, samples):
+    """Resample polylines to `samples` points spaced evenly along their length.
+
+    points is (paths, max_len, 2), padded by repeating each path's last point,
+    and lengths the real point count of each path. Returns (paths, samples, 2).
+    """
+    points = np.asarray(points, dtype=np.float32)
+    count, max_len = points.shape[:2]
+    if max_len == 1:
+        return np.repeat(points, samples, axis=1)
+
+    seg = np.linalg.norm(np.diff(points, axis=1), axis=-1)
+    cum = np.concatenate([np.zeros((count, 1), np.float32), np.cumsum(seg, axis=1)], axis=1)
+    targets = np.linspace(0.0, 1.0, samples, dtype=np.float32) * cum[:, -1:]
+
+    # Segment that holds each target distance
+    idx = (cum[:, None, :] <= targets[:, :, None]).sum(-1) - 1
+    idx = np.clip(idx, 0, max(np.max(lengths) - 2, 0))
+    rows = np.arange(count)[:, None]
+    seg_len = seg[rows, idx]
+    frac = np.divide(targets - cum[rows, idx], seg_len, out=np.zeros_like(seg_len), where=seg_len > 0)
+    start = points[rows, idx]
+    return start + np.clip(frac, 0.0, 1.0)[..., None] * (points[rows, idx + 1] - start)
+
+
+class SwipeDecoder:
+    """Decodes a fingertip path drawn across the keys into the most likely word.
+
+    Every lexicon word gets a template: the polyline through its key centers,
+    resampled to a fixed number of points. Templates are built once per layout.
+    A path is compared only with words whose first and last letters are near
+    its endpoints. The cost is the mean point distance in key sizes, minus a
+    small bonus for frequent words.
+    """
+
+    def __init__(self, predictor, samples=32, endpoint_keys=3, freq_weight=0.1):
+        self.predictor = predictor
+        self.samples = samples
+        self.endpoint_keys = endpoint_keys  # Candidate keys around each endpoint
+        self.freq_weight = freq_weight
+        self._templates = {}
+
+    def _letter_centers(self, layout):
+        centers = {}
+        for key, (x, y, width, height, _) in layout.rects.items():
+            if len(key) == 1 and key.isalpha():
+                centers[key] = (x + width / 2, y + height / 2)
+        return centers
+
+    def templates(self, layout):
+        """Template paths for a layout, built on first use and cached per geometry"""
+        cache_key = (layout.width, layout.height, tuple(map(tuple, layout.keys)), layout.key_margin)
+        cached = self._templates.get(cache_key)
+        if cached is not None:
+            return cached
+
+        self.predictor.load()
+        centers = self._letter_centers(layout)
+        letters = sorted(centers)
+        letter_index = {letter: i for i, letter in enumerate(letters)}
+
+        words, word_ids, paths = [], [], []
+        for i, word in enumerate(self.predictor.words):
+            if not all(c in centers for c in word):
+                continue
+            # Repeated letters do not move the finger
+            path = [c for j, c in enumerate(word) if j == 0 or c != word[j - 1]]
+            words.append(word)
+            word_ids.append(i)
+            paths.append([letter_index[c] for c in path])
+
+        lengths = np.array([len(p) for p in paths], dtype=np.int64)
+        max_len = int(lengths.max(initial=1))
+        padded = np.array([p + [p[-1]] * (max_len - len(p)) for p in paths], dtype=np.int64).reshape(-1, max_len)
+        letter_xy = np.array([centers[c] for c in letters], dtype=np.float32).reshape(-1, 2)
+        shapes = resample_paths(letter_xy[padded], lengths, self.samples) if len(words) else \
+            np.zeros((0, self.samples, 2), np.float32)
+
+        # Group words by (first, last) letter so pruning is a couple of slices
+        first = padded[:, 0]
+        last = padded[np.arange(len(padded)), lengths - 1]
+        group = first * len(letters) + last
+        order = np.argsort(group, kind='stable')
+        counts = self.predictor.counts[word_ids].astype(np.float64)
+
+        cached = {
+            'letters': letters,
+            'letter_xy': letter_xy,
+            'words': [words[i] for i in order],
+            'shapes': shapes[order],
+            'prior': self.freq_weight * np.log(counts[order] / max(counts.max(initial=1.0), 1.0)),
+            'group_starts': np.searchsorted(group[order], np.arange(len(letters) ** 2 + 1)),
+            'key_size': float(layout.key_size),
+        }
+        self._templates[cache_key] = cached
+        return cached
+
+    def _nearest_letters(self, point, letter_xy, key_size):
+        distances = np.linalg.norm(letter_xy - point, axis=-1)
+        nearest = np.argsort(distances)[:self.endpoint_keys]
+        return nearest[distances[nearest] <= distances[nearest[0]] + key_size]
+
+    def decode(self, path, layout, top=1):
+        """Return the best word (or the `top` best as a list) for a path, None for a tap"""
+        path = np.asarray(path, dtype=np.float32).reshape(-1, 2)
+        templates = self.templates(layout)
+        key_size = templates['key_size']
+        if len(path) < 2 or np.linalg.norm(np.diff(path, axis=0), axis=-1).sum() < key_size:
+            return None
+
+        letter_xy = templates['letter_xy']
+        starts = templates['group_starts']
+        num_letters = len(templates['letters'])
+        firsts = self._nearest_letters(path[0], letter_xy, key_size)
+        lasts = self._nearest_letters(path[-1], letter_xy, key_size)
+        groups = (firsts[:, None] * num_letters + lasts[None, :]).ravel()
+        candidates = np.concatenate([np.arange(starts[g], starts[g + 1]) for g in groups])
+        if not len(candidates):
+            return None
+
+        shape = resample_paths(path[None], np.array([len(path)]), self.samples)[0]
+        distance = np.linalg.norm(templates['shapes'][candidates] - shape, axis=-1).mean(axis=1) / key_size
+        cost = distance - templates['prior'][candidates]
+
+        if top == 1:
+            return templates['words'][candidates[np.argmin(cost)]]
+        best = np.argsort(cost)[:top]
+        return [templates['words'][i] for i in candidates[best]]
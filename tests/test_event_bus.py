@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from event_bus import EventBus, SocketSink
+
+
+def read_lines(server):
+    """Accept the sink's connection and read JSON lines until it closes"""
+    server.settimeout(5.0)
+    conn, _ = server.accept()
+    with conn:
+        conn.settimeout(5.0)
+        data = b''
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+class SocketSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.address = f"tcp:127.0.0.1:{self.server.getsockname()[1]}"
+
+    def tearDown(self):
+        self.server.close()
+
+    def bus(self, **options):
+        # A long interval means only key events and close() wake the dispatcher
+        return EventBus([SocketSink(self.address)], flush_interval=10.0, **options)
+
+    def test_events_arrive_as_json_lines(self):
+        bus = self.bus()
+        bus.emit('pinch', t=1.0, hand=0, state='start', x=10, y=20)
+        bus.emit('key', t=1.5, hand=0, key='A', text='A')
+        bus.close()
+
+        events = read_lines(self.server)
+        self.assertEqual(events, [
+            {'t': 1.0, 'hand': 0, 'state': 'start', 'x': 10, 'y': 20, 'type': 'pinch'},
+            {'t': 1.5, 'hand': 0, 'key': 'A', 'text': 'A', 'type': 'key'},
+        ])
+        self.assertEqual(bus.stats(), {'delivered': 2, 'dropped': 0, 'coalesced': 0})
+
+    def test_hover_events_coalesce_per_hand(self):
+        bus = self.bus()
+        for i, key in enumerate('QWE'):
+            bus.emit('hover', t=float(i), hand=0, key=key)
+        bus.emit('hover', t=0.5, hand=1, key='Z')
+        bus.emit('key', t=3.0, hand=0, key='E', text='E')
+        bus.close()
+
+        events = read_lines(self.server)
+        self.assertEqual([(e['type'], e['hand'], e['key']) for e in events],
+                         [('hover', 0, 'E'), ('hover', 1, 'Z'), ('key', 0, 'E')])
+        self.assertEqual(bus.coalesced, 2)
+
+    def test_full_queue_drops_and_counts(self):
+        bus = self.bus(max_queue=3)
+        for i in range(5):
+            bus.emit('pinch', t=float(i), hand=0, state='start')
+        self.assertEqual(bus.dropped, 2)
+
+        # A key still gets in, evicting the oldest queued event
+        bus.emit('key', t=5.0, hand=0, key='A', text='A')
+        bus.close()
+
+        events = read_lines(self.server)
+        self.assertEqual([e['t'] for e in events], [1.0, 2.0, 5.0])
+        self.assertEqual(bus.dropped, 3)
+
+    def test_unreachable_socket_drops_batches(self):
+        self.server.close()
+        sink = SocketSink(self.address, retry_interval=60.0)
+        sink.write([{'type': 'key', 'key': 'A'}, {'type': 'key', 'key': 'B'}])
+        sink.write([{'type': 'key', 'key': 'C'}])  # Within the retry interval, so not even tried
+        self.assertEqual(sink.dropped, 3)
+        sink.close()
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "needs UNIX sockets")
+class UnixSocketSinkTest(unittest.TestCase):
+    def test_events_arrive_over_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'events.sock')
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(path)
+            server.listen(1)
+            try:
+                bus = EventBus([SocketSink(f"unix:{path}")], flush_interval=10.0)
+                bus.emit('key', t=1.0, hand=1, key='SPACE', text=' ')
+                bus.close()
+                events = read_lines(server)
+            finally:
+                server.close()
+        self.assertEqual(events, [{'t': 1.0, 'hand': 1, 'key': 'SPACE', 'text': ' ', 'type': 'key'}])
+
+
+class CloseTest(unittest.TestCase):
+    def test_close_does_not_drain_while_a_sink_is_stuck(self):
+        release = threading.Event()
+
+        class StuckSink:
+            def __init__(self):
+                self.threads = set()
+
+            def write(self, batch):
+                self.threads.add(threading.current_thread().name)
+                release.wait(5.0)
+
+            def close(self):
+                pass
+
+        sink = StuckSink()
+        bus = EventBus([sink], flush_interval=10.0, batch_size=1)
+        bus.emit('key', t=1.0, key='A', text='A')
+        bus.emit('key', t=2.0, key='B', text='B')
+        bus.close(timeout=0.2)
+        release.set()
+        bus._thread.join(5.0)
+
+        # Only the dispatcher thread ever wrote to the sink
+        self.assertEqual(sink.threads, {'event-bus'})
+
+
+if __name__ == '__main__':
+    unittest.main()
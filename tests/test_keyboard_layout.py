@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from keyboard_layout import KeyboardLayout, EDIT_KEYS, suggestion_keys
+
+LETTERS = [
+    ['Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P'],
+    ['A', 'S', 'D', 'F', 'G', 'H', 'J', 'K', 'L'],
+    ['Z', 'X', 'C', 'V', 'B', 'N', 'M'],
+    ['SPACE', 'CLEAR', 'BACK'],
+]
+LAYOUTS = {
+    'default': LETTERS,
+    'suggest': [suggestion_keys(3)] + LETTERS,
+    'edit': LETTERS + [EDIT_KEYS],
+    'suggest+edit': [suggestion_keys(3)] + LETTERS + [EDIT_KEYS],
+}
+SIZES = [(1280, 720), (640, 480), (1920, 1080), (3840, 2160), (320, 240)]
+
+
+class LayoutFitTest(unittest.TestCase):
+    def test_every_key_inside_the_frame(self):
+        for name, keys in LAYOUTS.items():
+            for width, height in SIZES:
+                with self.subTest(layout=name, size=(width, height)):
+                    layout = KeyboardLayout(keys, width, height)
+                    rects = layout.rects.values()
+                    self.assertGreaterEqual(min(y for _, y, _, _, _ in rects), 0)
+                    self.assertLessEqual(max(y + h for _, y, _, h, _ in rects), height - layout.margin)
+                    self.assertLessEqual(max(x + w for x, _, w, _, _ in rects), width)
+
+    def test_default_layout_keeps_its_position(self):
+        layout = KeyboardLayout(LETTERS, 1280, 720)
+        self.assertEqual((layout.key_size, layout.start_y), (57, 412))
+
+
+def key_by_rects(layout, point):
+    """Reference hit test: the key whose rectangle strictly contains the point"""
+    px, py = point
+    for key, (x, y, w, h, _) in layout.rects.items():
+        if x < px < x + w and y < py < y + h:
+            return key
+    return None
+
+
+class HitTestTest(unittest.TestCase):
+    def test_key_centers_hit_their_key(self):
+        layout = KeyboardLayout(LAYOUTS['suggest+edit'], 1280, 720)
+        centers = [(x + w / 2, y + h / 2) for x, y, w, h, _ in layout.rects.values()]
+        self.assertEqual([layout.key_at(center) for center in centers], list(layout.rects))
+        self.assertEqual(layout.keys_at(centers), list(layout.rects))
+
+    def test_vectorized_and_single_point_paths_agree(self):
+        rng = np.random.default_rng(0)
+        for name, keys in LAYOUTS.items():
+            for width, height in SIZES:
+                with self.subTest(layout=name, size=(width, height)):
+                    layout = KeyboardLayout(keys, width, height)
+                    # Random points, plus every key corner and the pixels just outside it
+                    points = rng.uniform((-10, -10), (width + 10, height + 10), (2000, 2)).round().tolist()
+                    for x, y, w, h, _ in layout.rects.values():
+                        for dx in (-1, 0, w - 1, w):
+                            for dy in (-1, 0, h - 1, h):
+                                points.append((x + dx, y + dy))
+                    expected = [key_by_rects(layout, point) for point in points]
+                    self.assertEqual(layout.keys_at(points), expected)
+                    self.assertEqual([layout.key_at(point) for point in points], expected)
+
+    def test_empty_input(self):
+        layout = KeyboardLayout(LETTERS, 1280, 720)
+        self.assertEqual(layout.hit_test(np.zeros((0, 2))).shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from hand_detector import INDEX_TIP, NUM_LANDMARKS
+from landmark_filter import LandmarkSmoother
+
+FPS = 30
+STILL, MOVING = 2.0, 1.0  # Seconds of each phase
+SPEED = 0.5  # Normalized units per second, along x
+NOISE = 1.5e-3
+HORIZON = 0.06
+WIDTH = 1280
+
+
+class StillThenMovingTrace:
+    """A hand held still, then moving at constant speed, seen with landmark noise"""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.base = rng.uniform(0.3, 0.5, (NUM_LANDMARKS, 3)).astype(np.float32)
+        self.times = np.arange(int((STILL + MOVING) * FPS)) / FPS
+        self.observed = [self.truth(t) + rng.normal(0, NOISE, self.base.shape).astype(np.float32)
+                         for t in self.times]
+
+    def truth(self, t):
+        hand = self.base.copy()
+        hand[:, 0] += max(t - STILL, 0.0) * SPEED
+        return hand
+
+    def errors(self, smoother=None, horizon=0.0):
+        """p95 index tip error in pixels against where the hand is `horizon` later, (still, moving)"""
+        still, moving = [], []
+        for t, hand in zip(self.times, self.observed):
+            shown = hand if smoother is None else smoother.apply(hand[None], t)[0]
+            error = np.linalg.norm(shown[INDEX_TIP, :2] - self.truth(t + horizon)[INDEX_TIP, :2]) * WIDTH
+            (still if t < STILL else moving).append(error)
+        # Skip the filter settling in at the start and the speed ramp after the hand starts moving
+        return np.percentile(still[10:], 95), np.percentile(moving[10:], 95)
+
+
+class PredictionTest(unittest.TestCase):
+    def setUp(self):
+        self.trace = StillThenMovingTrace()
+
+    def test_prediction_adds_no_jitter_to_a_still_hand(self):
+        raw_still, _ = self.trace.errors()
+        for method in ('kalman', 'one-euro'):
+            with self.subTest(method=method):
+                filtered_still, _ = self.trace.errors(LandmarkSmoother(method))
+                predicted_still, _ = self.trace.errors(LandmarkSmoother(method, prediction=HORIZON), HORIZON)
+                self.assertLess(filtered_still, raw_still)
+                self.assertLess(predicted_still, raw_still)
+                self.assertLess(predicted_still, filtered_still * 1.1)
+
+    def test_prediction_catches_up_with_a_moving_hand(self):
+        # Showing the current landmarks lags the hand by the whole horizon
+        _, lag = self.trace.errors(horizon=HORIZON)
+        for method in ('kalman', 'one-euro'):
+            with self.subTest(method=method):
+                _, predicted = self.trace.errors(LandmarkSmoother(method, prediction=HORIZON), HORIZON)
+                self.assertLess(predicted, lag / 3)
+
+    def test_auto_prediction_follows_the_latency(self):
+        smoother = LandmarkSmoother('kalman', prediction='auto')
+        for _ in range(100):
+            smoother.observe_latency(0.2)
+        self.assertEqual(smoother.horizon(), smoother.max_prediction)
+
+
+if __name__ == '__main__':
+    unittest.main()
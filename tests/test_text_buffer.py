@@ -0,0 +1,145 @@
+import random
+import unittest
+
+from text_buffer import GapBuffer
+
+
+class Reference:
+    """Plain string model of the buffer: text, cursor and full-state undo"""
+
+    def __init__(self, text=""):
+        self.text = text
+        self.cursor = len(text)
+        self.history = []
+
+    def _save(self):
+        self.history.append((self.text, self.cursor))
+
+    def insert(self, text):
+        if text:
+            self._save()
+            self.text = self.text[:self.cursor] + text + self.text[self.cursor:]
+            self.cursor += len(text)
+
+    def delete_back(self, count):
+        count = min(count, self.cursor)
+        if count > 0:
+            self._save()
+            self.text = self.text[:self.cursor - count] + self.text[self.cursor:]
+            self.cursor -= count
+
+    def delete_word(self):
+        # Back over trailing spaces, then over the word before them
+        position = len(self.text[:self.cursor].rstrip(' '))
+        while position and self.text[position - 1] != ' ':
+            position -= 1
+        self.delete_back(self.cursor - position)
+
+    def replace_back(self, count, text):
+        self._save()
+        count = min(count, self.cursor)
+        self.text = self.text[:self.cursor - count] + text + self.text[self.cursor:]
+        self.cursor += len(text) - count
+
+    def clear(self):
+        if self.text:
+            self._save()
+            self.text, self.cursor = "", 0
+
+    def move_cursor(self, delta):
+        self.cursor = max(0, min(len(self.text), self.cursor + delta))
+
+    def undo(self):
+        if self.history:
+            self.text, self.cursor = self.history.pop()
+
+
+class GapBufferTest(unittest.TestCase):
+    def assertState(self, buffer, text, cursor):
+        self.assertEqual((buffer.text, buffer.cursor, len(buffer)), (text, cursor, len(text)))
+
+    def test_insert_at_the_cursor(self):
+        buffer = GapBuffer("HELLO")
+        buffer.move_cursor(-3)
+        buffer.insert("Y ")
+        self.assertState(buffer, "HEY LLO", 4)
+        self.assertEqual(buffer.slice(2, 6), "Y LL")  # Spans the gap
+        self.assertEqual(buffer.tail(3), "LLO")
+
+    def test_cursor_stays_inside_the_text(self):
+        buffer = GapBuffer("AB")
+        buffer.move_cursor(-5)
+        self.assertState(buffer, "AB", 0)
+        buffer.move_cursor(5)
+        self.assertState(buffer, "AB", 2)
+
+    def test_delete_word(self):
+        buffer = GapBuffer("HELLO BIG  WORLD  ")
+        buffer.delete_word()
+        self.assertState(buffer, "HELLO BIG  ", 11)
+        buffer.delete_word()
+        self.assertState(buffer, "HELLO ", 6)
+        buffer.delete_word()
+        self.assertState(buffer, "", 0)
+        self.assertEqual(buffer.delete_word(), "")
+
+    def test_current_word(self):
+        buffer = GapBuffer("HELLO WOR")
+        self.assertEqual(buffer.current_word(), "WOR")
+        buffer.insert(" ")
+        self.assertEqual(buffer.current_word(), "")
+
+    def test_replace_back_undoes_in_one_step(self):
+        buffer = GapBuffer("SAY WO")
+        buffer.replace_back(2, "WORLD ")
+        self.assertState(buffer, "SAY WORLD ", 10)
+        self.assertTrue(buffer.undo())
+        self.assertState(buffer, "SAY WO", 6)
+
+    def test_undo_clear_restores_text_and_cursor(self):
+        buffer = GapBuffer("HELLO WORLD")
+        buffer.move_cursor(-6)
+        buffer.clear()
+        self.assertState(buffer, "", 0)
+        self.assertTrue(buffer.undo())
+        self.assertState(buffer, "HELLO WORLD", 5)
+
+    def test_undo_with_nothing_to_undo(self):
+        buffer = GapBuffer()
+        self.assertFalse(buffer.undo())
+        buffer.clear()  # Clearing an empty buffer records nothing
+        self.assertFalse(buffer.undo())
+
+    def test_version_changes_on_every_edit(self):
+        buffer = GapBuffer("AB")
+        versions = [buffer.version]
+        for edit in (lambda: buffer.insert("C"), lambda: buffer.move_cursor(-1), buffer.delete_back, buffer.undo):
+            edit()
+            versions.append(buffer.version)
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_matches_reference_model(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            buffer = GapBuffer(capacity=4)
+            reference = Reference()
+            for _ in range(300):
+                operation = rng.choice(['insert', 'insert', 'delete_back', 'delete_word', 'replace_back',
+                                        'clear', 'move_cursor', 'undo'])
+                if operation == 'insert':
+                    args = (''.join(rng.choice('AB ') for _ in range(rng.randint(1, 4))),)
+                elif operation in ('delete_back', 'replace_back'):
+                    args = (rng.randint(1, 4),)
+                    if operation == 'replace_back':
+                        args += (rng.choice(['WORD ', 'A', '']),)
+                elif operation == 'move_cursor':
+                    args = (rng.randint(-5, 5),)
+                else:
+                    args = ()
+                getattr(buffer, operation)(*args)
+                getattr(reference, operation)(*args)
+                self.assertState(buffer, reference.text, reference.cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from hand_detector import NUM_LANDMARKS, THUMB_TIP, INDEX_TIP
+from text_buffer import GapBuffer
+from virtual_keyboard import VirtualKeyboard
+
+WIDTH, HEIGHT = 1280, 720
+SHAPE = (HEIGHT, WIDTH, 3)
+
+
+class Words:
+    """Predictor stand-in: completions in list order"""
+    top_k = 3
+    words = ['THE', 'THEY', 'THERE', 'WORD', 'WORLD', 'WORK']
+
+    def suggest(self, prefix):
+        return [word for word in self.words if prefix and word.startswith(prefix)][:self.top_k]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1.0
+
+    def __call__(self):
+        return self.now
+
+
+def hands_at(keyboard, keys, pinching=False):
+    """(hands, 21, 3) pixel landmarks with each index tip on the center of a key"""
+    rects = keyboard.get_layout(WIDTH, HEIGHT).rects
+    landmarks = np.zeros((len(keys), NUM_LANDMARKS, 3), dtype=np.float32)
+    for hand, key in zip(landmarks, keys):
+        x, y, w, h, _ = rects[key]
+        hand[INDEX_TIP, :2] = (x + w // 2, y + h // 2)
+        hand[THUMB_TIP, :2] = hand[INDEX_TIP, :2] + (5 if pinching else 200)
+    return landmarks
+
+
+class SuggestionTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.keyboard = VirtualKeyboard(clock=self.clock, predictor=Words(), max_hands=2)
+        self.first = self.keyboard.session(0)
+        self.second = self.keyboard.session(1)
+        for key in 'WO':
+            self.keyboard.process_key_press(key, self.second)
+        for key in 'THE':
+            self.keyboard.process_key_press(key, self.first)
+
+    def step(self, keys, pinching=False, dt=0.1):
+        self.clock.now += dt
+        return self.keyboard.update_hands(hands_at(self.keyboard, keys, pinching), [1], SHAPE)
+
+    def dwell_and_pinch(self, key):
+        self.step([key])
+        self.step([key], dt=self.keyboard.hover_duration)
+        return self.step([key], pinching=True)
+
+    def test_slots_show_the_hand_that_enters_the_row(self):
+        self.assertEqual(self.keyboard._key_label('SUGGEST1'), 'THE')
+        self.step(['SUGGEST1'])
+        self.assertEqual(self.keyboard._key_label('SUGGEST1'), 'WORD')
+
+    def test_selection_inserts_the_shown_word(self):
+        pressed = self.dwell_and_pinch('SUGGEST1')
+        self.assertEqual(pressed, [(1, 'WORD')])
+        self.assertEqual(self.second.text, 'WORD ')
+        self.assertEqual(self.first.text, 'THE')
+
+    def test_selection_after_another_hand_typed_inserts_nothing(self):
+        self.step(['SUGGEST1'])
+        self.step(['SUGGEST1'], dt=self.keyboard.hover_duration)
+        self.keyboard.process_key_press('Y', self.first)  # The slots now show THEY
+        self.assertEqual(self.keyboard._key_label('SUGGEST1'), 'THEY')
+
+        self.step(['SUGGEST1'], pinching=True)
+        self.assertEqual(self.second.text, 'WO')
+        self.assertEqual(self.keyboard._key_label('SUGGEST1'), 'WORD')
+
+
+def text_width(text, font_scale=1.0):
+    return cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0][0]
+
+
+class FitTextTest(unittest.TestCase):
+    def test_text_that_fits_is_shown_whole(self):
+        for n in range(1, 40):
+            text = "I" + "W" * n
+            buffer = GapBuffer(text)
+            for extra in range(3):
+                with self.subTest(n=n, extra=extra):
+                    max_width = text_width(text) + extra
+                    self.assertEqual(VirtualKeyboard._fit_text(buffer, "", len(text), max_width, 1.0), len(text))
+
+    def test_longest_tail_that_fits_behind_the_ellipsis(self):
+        text = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG"
+        buffer = GapBuffer(text)
+        for max_width in range(150, text_width("1: " + text), 37):
+            with self.subTest(max_width=max_width):
+                count = VirtualKeyboard._fit_text(buffer, "1: ", len(text), max_width, 1.0)
+                self.assertLess(count, len(text))
+                self.assertLessEqual(text_width("1: ..." + text[len(text) - count:]), max_width)
+                self.assertGreater(text_width("1: ..." + text[len(text) - count - 1:]), max_width)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+class GapBuffer:
+    """Editable text with a cursor, stored as a gap buffer.
+
+    Inserting or deleting at the cursor is amortized O(1); moving the cursor
+    costs the distance moved. `version` changes on every edit or cursor move,
+    so renderers can cache whatever they draw from the buffer.
+    """
+
+    def __init__(self, text="", capacity=64, undo_limit=500):
+        size = max(capacity, len(text) * 2)
+        self._data = list(text) + [''] * (size - len(text))
+        self._gap_start = len(text)
+        self._gap_end = size
+        self._undo = []
+        self.undo_limit = undo_limit
+        self.version = 0
+        self._text_cache = (None, "")
+
+    def __len__(self):
+        return len(self._data) - (self._gap_end - self._gap_start)
+
+    @property
+    def cursor(self):
+        return self._gap_start
+
+    @property
+    def text(self):
+        version, text = self._text_cache
+        if version != self.version:
+            text = ''.join(self._data[:self._gap_start]) + ''.join(self._data[self._gap_end:])
+            self._text_cache = (self.version, text)
+        return text
+
+    def __str__(self):
+        return self.text
+
+    def slice(self, start, end):
+        """Text between two logical positions, without building the whole string"""
+        start = max(0, start)
+        end = min(len(self), end)
+        if start >= end:
+            return ""
+        gap = self._gap_end - self._gap_start
+        if end <= self._gap_start:
+            return ''.join(self._data[start:end])
+        if start >= self._gap_start:
+            return ''.join(self._data[start + gap:end + gap])
+        return ''.join(self._data[start:self._gap_start]) + ''.join(self._data[self._gap_end:end + gap])
+
+    def tail(self, count):
+        return self.slice(len(self) - count, len(self))
+
+    def _changed(self):
+        self.version += 1
+
+    def _record(self, operation):
+        self._undo.append(operation)
+        if len(self._undo) > self.undo_limit:
+            del self._undo[0]
+
+    def _grow(self, needed):
+        gap = self._gap_end - self._gap_start
+        if gap >= needed:
+            return
+        extra = max(needed - gap, len(self._data))
+        self._data[self._gap_end:self._gap_end] = [''] * extra
+        self._gap_end += extra
+
+    def move_cursor_to(self, position):
+        position = max(0, min(len(self), position))
+        if position < self._gap_start:
+            count = self._gap_start - position
+            self._data[self._gap_end - count:self._gap_end] = self._data[position:self._gap_start]
+            self._gap_start -= count
+            self._gap_end -= count
+        elif position > self._gap_start:
+            count = position - self._gap_start
+            self._data[self._gap_start:self._gap_start + count] = self._data[self._gap_end:self._gap_end + count]
+            self._gap_start += count
+            self._gap_end += count
+        else:
+            return
+        self._changed()
+
+    def move_cursor(self, delta):
+        self.move_cursor_to(self._gap_start + delta)
+
+    def _insert(self, text):
+        self._grow(len(text))
+        self._data[self._gap_start:self._gap_start + len(text)] = list(text)
+        self._gap_start += len(text)
+        self._changed()
+
+    def _delete_before(self, count):
+        count = min(count, self._gap_start)
+        removed = ''.join(self._data[self._gap_start - count:self._gap_start])
+        self._gap_start -= count
+        self._changed()
+        return removed
+
+    def insert(self, text):
+        if not text:
+            return
+        self._record(('insert', self._gap_start, text))
+        self._insert(text)
+
+    def delete_back(self, count=1):
+        if not self._gap_start or count <= 0:
+            return ""
+        removed = self._delete_before(count)
+        self._record(('delete', self._gap_start, removed))
+        return removed
+
+    def delete_word(self):
+        """Delete back to the start of the previous word, like Ctrl+Backspace"""
+        position = self._gap_start
+        while position and self._data[position - 1] == ' ':
+            position -= 1
+        while position and self._data[position - 1] != ' ':
+            position -= 1
+        return self.delete_back(self._gap_start - position)
+
+    def current_word(self):
+        """The partial word directly before the cursor"""
+        position = self._gap_start
+        while position and self._data[position - 1] != ' ':
+            position -= 1
+        return ''.join(self._data[position:self._gap_start])
+
+    def replace_back(self, count, text):
+        """Replace the count characters before the cursor with text as one undo step"""
+        removed = self._delete_before(count)
+        self._insert(text)
+        self._record(('replace', self._gap_start - len(text), (removed, text)))
+
+    def clear(self):
+        if not len(self):
+            return
+        removed = self.text
+        self._record(('clear', self._gap_start, removed))
+        self._data = [''] * len(self._data)
+        self._gap_start = 0
+        self._gap_end = len(self._data)
+        self._changed()
+
+    def set_text(self, text):
+        self.clear()
+        self._insert(text)
+
+    def undo(self):
+        """Revert the most recent edit, returns False when there is nothing to undo"""
+        if not self._undo:
+            return False
+        kind, position, text = self._undo.pop()
+        if kind == 'insert':
+            self.move_cursor_to(position + len(text))
+            self._delete_before(len(text))
+        elif kind == 'delete':
+            self.move_cursor_to(position)
+            self._insert(text)
+        elif kind == 'replace':
+            removed, inserted = text
+            self.move_cursor_to(position + len(inserted))
+            self._delete_before(len(inserted))
+            self._insert(removed)
+        else:
+            self._data = [''] * max(len(self._data), len(text) * 2)
+            self._gap_start = 0
+            self._gap_end = len(self._data)
+            self._insert(text)
+            self.move_cursor_to(position)
+        return True
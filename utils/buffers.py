@@ -0,0 +1,30 @@
+import math
+
+import numpy as np
+
+
+class FramePool:
+    """Named frame buffers that are reused from frame to frame.
+
+    get() returns a contiguous view of the requested shape on a flat backing
+    buffer that only ever grows, so a crop that changes size every frame does
+    not cause a new allocation. `allocations` counts how often a backing
+    buffer had to be created or grown; in steady state it stops increasing.
+    """
+
+    def __init__(self, headroom=1.25):
+        self.headroom = headroom  # Grow a bit beyond the request so slowly growing crops settle
+        self.allocations = 0
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        size = math.prod(shape)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = np.empty(int(size * self.headroom), dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+        return buffer[:size].reshape(shape)
+
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
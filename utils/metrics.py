@@ -0,0 +1,311 @@
+import cProfile
+import csv
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+
+class RollingHistogram:
+    """Fixed-size ring buffer of the most recent samples"""
+
+    def __init__(self, size=300):
+        self.size = size
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.count = 0
+
+    def record(self, value):
+        self.samples[self.count % self.size] = value
+        self.count += 1
+
+    def values(self):
+        return self.samples[:min(self.count, self.size)]
+
+    def percentiles(self, q=(50, 95, 99)):
+        values = self.values()
+        if not len(values):
+            return [0.0] * len(q)
+        return np.percentile(values, q).tolist()
+
+
+class StageProfiler:
+    """Per-stage timings of the frame loop, kept as rolling histograms.
+
+    Recording a sample is a single array write, so timers can stay in the hot
+    path; percentiles are only computed when a summary is requested.
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, RollingHistogram(self.window))
+        histogram.record(seconds)
+
+    @contextmanager
+    def section(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def summary(self):
+        summary = {}
+        for stage, histogram in list(self.stages.items()):
+            values = histogram.values()
+            p50, p95, p99 = histogram.percentiles()
+            summary[stage] = {
+                'count': histogram.count,
+                'mean_ms': float(values.mean()) * 1000 if len(values) else 0.0,
+                'p50_ms': p50 * 1000,
+                'p95_ms': p95 * 1000,
+                'p99_ms': p99 * 1000,
+            }
+        return summary
+
+    def draw_overlay(self, image, x=10, y=None):
+        """Draw a p50/p95/p99 table of every stage onto the frame"""
+        if y is None:
+            y = int(image.shape[0] * 0.12) + 50
+        line_height = 20
+
+        cv2.putText(image, f"{'stage':<14}{'p50':>7}{'p95':>7}{'p99':>7}  ms", (x, y),
+                   cv2.FONT_HERSHEY_PLAIN, 1.1, (0, 255, 0), 1)
+        for stage, stats in self.summary().items():
+            y += line_height
+            line = f"{stage:<14}{stats['p50_ms']:7.1f}{stats['p95_ms']:7.1f}{stats['p99_ms']:7.1f}"
+            cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.1, (0, 255, 0), 1)
+
+
+class MetricsExporter:
+    """Periodically writes profiler summaries to a file and/or serves them over HTTP.
+
+    Files ending in .csv get one row per stage appended on every export; any
+    other path is overwritten with the latest JSON snapshot. The HTTP endpoint
+    only listens on localhost and answers GET /metrics.
+    """
+
+    CSV_FIELDS = ['timestamp', 'stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms']
+
+    def __init__(self, profiler, path=None, port=None, interval=5.0):
+        self.profiler = profiler
+        self.path = path
+        self.interval = interval
+        self._next_export = time.monotonic() + interval
+        self._latest = {}
+        self._server = None
+
+        if port is not None:
+            self._start_server(port)
+
+    def _start_server(self, port):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = json.dumps(exporter._latest).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Serving metrics on http://127.0.0.1:{self._server.server_port}/metrics")
+
+    def maybe_export(self):
+        """Export if the interval has passed; cheap enough to call every frame"""
+        now = time.monotonic()
+        if now < self._next_export:
+            return
+        self._next_export = now + self.interval
+        self.export()
+
+    def export(self):
+        timestamp = time.time()
+        summary = self.profiler.summary()
+        self._latest = {'timestamp': timestamp, 'stages': summary}
+
+        if not self.path:
+            return
+        if self.path.endswith('.csv'):
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                for stage, stats in summary.items():
+                    writer.writerow(dict(stats, timestamp=round(timestamp, 3), stage=stage))
+        else:
+            with open(self.path, 'w') as f:
+                json.dump(self._latest, f, indent=2)
+
+    def close(self):
+        self.export()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class FrameProfiler:
+    """Runs cProfile over the first N frames after start(), then prints or saves the results"""
+
+    def __init__(self, frames, output=None, top=25):
+        self.frames_left = frames
+        self.output = output
+        self.top = top
+        self.started = False
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        """Begin profiling; call right before the frame loop so startup is left out"""
+        if not self.started and self.frames_left > 0:
+            self.started = True
+            self._profile.enable()
+
+    @property
+    def active(self):
+        return self.frames_left > 0
+
+    def frame_done(self):
+        if self.frames_left <= 0 or not self.started:
+            return
+        self.frames_left -= 1
+        if self.frames_left == 0:
+            self.finish()
+
+    def finish(self):
+        if not self.started:
+            self.frames_left = 0
+            return  # The frame loop never ran, there is nothing to report
+        self._profile.disable()
+        self.frames_left = 0
+        if self.output:
+            self._profile.dump_stats(self.output)
+            print(f"Profile written to {self.output}")
+        else:
+            pstats.Stats(self._profile).sort_stats('cumulative').print_stats(self.top)
+
+
+class AllocationMeter:
+    """Memory allocated per frame on top of what is already live, via tracemalloc.
+
+    tracemalloc sees every numpy and OpenCV array, so the peak above the
+    start-of-frame level shows how much frame data one iteration allocates.
+    Temporaries that are freed before the next one is made overlap in the
+    peak, so the frame count is a lower bound. An optional FramePool's
+    (re)allocations are counted exactly. Tracing slows Python down; only
+    enable it to look for regressions.
+    """
+
+    def __init__(self, frame_bytes=1280 * 720 * 3, pool=None, window=300):
+        self.frame_bytes = frame_bytes
+        self.pool = pool
+        self.transient = RollingHistogram(window)
+        self.frames = 0
+        self._pool_start = pool.allocations if pool is not None else 0
+        tracemalloc.start()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def frame_done(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.transient.record(max(peak - self._base, 0))
+        tracemalloc.reset_peak()
+        self._base = current
+        self.frames += 1
+
+    def summary(self):
+        p50, p95, p99 = self.transient.percentiles()
+        summary = {
+            'frames': self.frames,
+            'p50_bytes': p50,
+            'p95_bytes': p95,
+            'p99_bytes': p99,
+            'p50_frame_buffers': p50 / self.frame_bytes,
+            'p95_frame_buffers': p95 / self.frame_bytes,
+        }
+        if self.pool is not None:
+            summary['pool_allocations'] = self.pool.allocations - self._pool_start
+            summary['pool_bytes'] = self.pool.nbytes()
+        return summary
+
+    def overlay_line(self):
+        stats = self.summary()
+        line = f"alloc/frame p50 {stats['p50_bytes'] / 1024:.0f} KB ({stats['p50_frame_buffers']:.1f} frames)"
+        if self.pool is not None:
+            line += f"  pool allocs {stats['pool_allocations']}"
+        return line
+
+    def report(self):
+        stats = self.summary()
+        print(f"Allocations per frame over the last {min(stats['frames'], self.transient.size)} frames: "
+              f"p50 {stats['p50_bytes'] / 1024:.0f} KB ({stats['p50_frame_buffers']:.2f} frame buffers), "
+              f"p95 {stats['p95_bytes'] / 1024:.0f} KB ({stats['p95_frame_buffers']:.2f} frame buffers)")
+        if self.pool is not None:
+            print(f"Frame pool: {stats['pool_allocations']} allocations, {stats['pool_bytes'] / 1e6:.1f} MB reused")
+
+    def close(self):
+        tracemalloc.stop()
+
+
+class Instrumentation:
+    """Bundles the profiler with the optional overlay, exporter, cProfile hook and allocation meter"""
+
+    def __init__(self, show_stats=False, metrics_file=None, metrics_port=None,
+                 metrics_interval=5.0, profile_frames=0, profile_output=None, allocations=None):
+        self.profiler = StageProfiler()
+        self.show_stats = show_stats
+        self.exporter = None
+        if metrics_file or metrics_port is not None:
+            self.exporter = MetricsExporter(self.profiler, path=metrics_file, port=metrics_port,
+                                            interval=metrics_interval)
+        self.frame_profiler = FrameProfiler(profile_frames, profile_output) if profile_frames else None
+        self.allocations = allocations  # Optional AllocationMeter
+
+    def annotate(self, image):
+        if self.show_stats:
+            self.profiler.draw_overlay(image)
+            if self.allocations is not None:
+                cv2.putText(image, self.allocations.overlay_line(), (10, int(image.shape[0] * 0.12) + 30),
+                            cv2.FONT_HERSHEY_PLAIN, 1.1, (0, 255, 0), 1)
+
+    def start(self):
+        """Call when the frame loop begins"""
+        if self.frame_profiler is not None:
+            self.frame_profiler.start()
+
+    def frame_done(self):
+        if self.exporter is not None:
+            self.exporter.maybe_export()
+        if self.frame_profiler is not None and self.frame_profiler.active:
+            self.frame_profiler.frame_done()
+        if self.allocations is not None:
+            self.allocations.frame_done()
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+        if self.frame_profiler is not None and self.frame_profiler.active:
+            self.frame_profiler.finish()
+        if self.allocations is not None:
+            self.allocations.report()
+            self.allocations.close()
@@ -0,0 +1,43 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Wall-clock time of each startup phase, including phases run in parallel.
+
+    Phases are (start, end) offsets from the timer's creation, so the report
+    shows both how long each phase took and where it overlapped the others.
+    """
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.t0
+
+    def record(self, name, start, end=None):
+        with self._lock:
+            self.phases[name] = (start, self.now() if end is None else end)
+
+    @contextmanager
+    def phase(self, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def summary(self):
+        with self._lock:
+            return {name: {'start_ms': start * 1000, 'duration_ms': (end - start) * 1000}
+                    for name, (start, end) in self.phases.items()}
+
+    def report(self, ready_phase='first_frame'):
+        print("Startup time by phase:")
+        for name, stats in sorted(self.summary().items(), key=lambda item: item[1]['start_ms']):
+            print(f"  {name:<14} {stats['duration_ms']:7.1f} ms  (from {stats['start_ms']:7.1f} ms)")
+        if ready_phase in self.phases:
+            print(f"Ready for input {self.phases[ready_phase][1] * 1000:.0f} ms after launch")
@@ -1,142 +1,375 @@
 import cv2
 import numpy as np
 import math
+import time
+from keyboard_layout import KeyboardLayout, suggestion_keys, is_suggestion_key, SUGGESTION_PREFIX, EDIT_KEYS
+from hand_detector import NUM_LANDMARKS, THUMB_TIP, INDEX_TIP
+from text_buffer import GapBuffer
+
+class HandSession:
+    """Hover/dwell/cooldown state and typed text of one tracked hand.
+
+    `slot` is the stable number shown in the UI and events; `track_id` is the
+    tracker id of the hand currently typing into it, which changes when a
+    hand leaves and comes back.
+    """
+
+    def __init__(self, slot=0):
+        self.slot = slot
+        self.track_id = slot
+        self.tracked = False  # A hand is typing into this session right now
+        self.last_active = None  # Clock time the session last had a hand, None until it has one
+        self.buffer = GapBuffer()
+        self.suggestions = []
+        self.pressed_key = None
+        self.hover_key = None
+        self.hover_start_time = 0
+        self.last_press_time = 0
+        self.pinching = False
+        self.swipe_path = None  # Fingertip points while a swipe is held
+
+    @property
+    def text(self):
+        return self.buffer.text
+
+    @text.setter
+    def text(self, value):
+        self.buffer.set_text(value)
+
+    def release(self):
+        self.hover_key = None
+        self.hover_start_time = 0
+        self.swipe_path = None
+
+
+def _primary_attribute(name):
+    # Single-hand state lives on the primary session; keep the old attribute names working
+    return property(lambda self: getattr(self.primary, name),
+                    lambda self, value: setattr(self.primary, name, value))
+
 
 class VirtualKeyboard:
-    def __init__(self):
+    text = _primary_attribute('text')
+    pressed_key = _primary_attribute('pressed_key')
+    hover_key = _primary_attribute('hover_key')
+    hover_start_time = _primary_attribute('hover_start_time')
+    last_press_time = _primary_attribute('last_press_time')
+
+    def __init__(self, clock=time.time, predictor=None, swipe_decoder=None, events=None, max_hands=1,
+                 edit_keys=False):
         self.keys = [
             ['Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P'],
             ['A', 'S', 'D', 'F', 'G', 'H', 'J', 'K', 'L'],
             ['Z', 'X', 'C', 'V', 'B', 'N', 'M'],
             ['SPACE', 'CLEAR', 'BACK']
         ]
-        self.text = ""
+        if edit_keys:
+            self.keys.append(list(EDIT_KEYS))
+        self.predictor = predictor
+        if predictor is not None:
+            self.keys.insert(0, suggestion_keys(predictor.top_k))
+        self.primary = HandSession(0)
+        self.sessions = {0: self.primary}  # Keyed by track id, at most max_hands of them
+        self.max_hands = max(max_hands, 1)
+        self._suggestion_session = self.primary  # Whose suggestions the slots show
+        self.swipe_decoder = swipe_decoder
+        self.events = events  # Optional EventBus for key, hover and pinch events
         self.base_key_size = 80
         self.key_margin = 8
-        self.pressed_key = None
-        self.hover_key = None
-        self.hover_start_time = 0
         self.hover_duration = 0.8
-        self.last_press_time = 0
         self.press_cooldown = 0.3
+        self.pinch_threshold = 50
+        self.clock = clock  # Replaceable so replays are reproducible
+        self._layout = None
+        self._layout_key = None
+        self._layer = None
+        self._text_layer = None
         
     def calculate_distance(self, point1, point2):
         return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
     
     def check_pinch(self, hand_positions):
-        thumb_tip = None
-        index_tip = None
-        
-        for pos in hand_positions:
-            if pos[0] == 4:
-                thumb_tip = (pos[1], pos[2])
-            elif pos[0] == 8:
-                index_tip = (pos[1], pos[2])
-        
-        if thumb_tip and index_tip:
-            distance = self.calculate_distance(thumb_tip, index_tip)
-            return distance < 50, index_tip
-        return False, None
-    
+        hand_positions = np.asarray(hand_positions)
+        if len(hand_positions) < NUM_LANDMARKS:
+            return False, None
+
+        # Rows are (id, x, y) per landmark; use the last hand like the detector does
+        hand = hand_positions[-NUM_LANDMARKS:]
+        thumb_tip = (int(hand[THUMB_TIP, 1]), int(hand[THUMB_TIP, 2]))
+        index_tip = (int(hand[INDEX_TIP, 1]), int(hand[INDEX_TIP, 2]))
+
+        distance = self.calculate_distance(thumb_tip, index_tip)
+        return distance < self.pinch_threshold, index_tip
+
+    def get_layout(self, w, h):
+        """Return the key geometry for a frame size, rebuilt only when it changes"""
+        layout_key = (w, h, tuple(tuple(row) for row in self.keys), self.key_margin)
+        if self._layout is None or self._layout_key != layout_key:
+            self._layout = KeyboardLayout(self.keys, w, h, key_margin=self.key_margin)
+            self._layout_key = layout_key
+        self.key_size = self._layout.key_size
+        return self._layout
+
+    def _key_style(self, key, special, state, progress=None):
+        if state == 'pressed':
+            if special and key == 'CLEAR':
+                key_color = (255, 120, 80)
+            elif special and key == 'BACK':
+                key_color = (255, 160, 0)
+            else:
+                key_color = (0, 180, 120)
+            border_color = (0, 200, 150)
+            text_color = (255, 255, 255)
+        elif state == 'hover':
+            if progress is not None:
+                blue_val = int(255 - progress * 100)
+                green_val = int(200 + progress * 55)
+                key_color = (0, green_val, blue_val)
+            else:
+                key_color = (0, 200, 255)
+            border_color = (0, 220, 255)
+            text_color = (255, 255, 255)
+        elif not special:
+            key_color = (245, 245, 245)
+            border_color = (180, 180, 180)
+            text_color = (70, 70, 70)
+        elif is_suggestion_key(key):
+            key_color = (235, 250, 235)
+            border_color = (120, 190, 120)
+            text_color = (60, 90, 60)
+        else:
+            if key == 'SPACE':
+                key_color = (230, 245, 255)
+                border_color = (100, 150, 200)
+            elif key == 'CLEAR':
+                key_color = (255, 240, 235)
+                border_color = (255, 150, 100)
+            else:
+                key_color = (255, 250, 230)
+                border_color = (255, 180, 50)
+            text_color = (80, 80, 80)
+        return key_color, border_color, text_color
+
+    def _key_label(self, key):
+        if not is_suggestion_key(key):
+            return key
+        slot = int(key[len(SUGGESTION_PREFIX):]) - 1
+        words = self._suggestion_session.suggestions
+        return words[slot] if slot < len(words) else ""
+
+    def _draw_key(self, image, key, rect, state, progress=None, offset=(0, 0), label=None):
+        x, y, width, height, special = rect
+        label = key if label is None else label
+        x -= offset[0]
+        y -= offset[1]
+        key_color, border_color, text_color = self._key_style(key, special, state, progress)
+
+        cv2.rectangle(image, (x, y), (x + width, y + height), key_color, -1)
+        cv2.rectangle(image, (x, y), (x + width, y + height), border_color, 2)
+
+        if not label:
+            return
+        font_scale = min(0.9, width / 80) if special else min(1.2, height / 60)
+        text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0]
+        text_x = x + (width - text_size[0]) // 2
+        text_y = y + (height + text_size[1]) // 2
+
+        cv2.putText(image, label, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX,
+                   font_scale, text_color, 2)
+
+    def _get_keyboard_layer(self, h, w):
+        """Render every key in its idle state once per layout"""
+        layout = self.get_layout(w, h)
+        if self._layer is not None and self._layer['layout'] is layout:
+            return self._layer
+
+        rects = layout.rects
+
+        # Only keep the bounding box of the keys (borders spill 1px outside a rect)
+        x0 = max(min(r[0] for r in rects.values()) - 1, 0)
+        y0 = max(min(r[1] for r in rects.values()) - 1, 0)
+        x1 = min(max(r[0] + r[2] for r in rects.values()) + 2, w)
+        y1 = min(max(r[1] + r[3] for r in rects.values()) + 2, h)
+
+        overlay = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for key, rect in rects.items():
+            # Suggestion words change per keystroke, so their slots are labelled per frame
+            label = "" if is_suggestion_key(key) else key
+            self._draw_key(overlay, key, rect, 'idle', offset=(x0, y0), label=label)
+            x, y, width, height, _ = rect
+            cv2.rectangle(mask, (x - x0, y - y0), (x - x0 + width, y - y0 + height), 255, -1)
+            cv2.rectangle(mask, (x - x0, y - y0), (x - x0 + width, y - y0 + height), 255, 2)
+
+        self._layer = {
+            'layout': layout,
+            'origin': (x0, y0),
+            'overlay': overlay,
+            'mask': mask,
+        }
+        return self._layer
+
+    def invalidate_layer(self):
+        """Force the layout and cached keyboard layer to be rebuilt on the next frame"""
+        self._layout = None
+        self._layout_key = None
+        self._layer = None
+        self._text_layer = None
+
     def draw_keyboard(self, image):
         h, w, _ = image.shape
-        
-        margin = 20
-        available_width = w - 2 * margin
-        available_height = int(h * 0.4)
-        
-        max_row_keys = 10
-        self.key_size = min(
-            (available_width - (max_row_keys - 1) * self.key_margin) // max_row_keys,
-            available_height // 5,
-            100
-        )
-        self.key_size = max(self.key_size, 50)
-        
-        start_y = h - available_height - margin
-        
-        for row_idx, row in enumerate(self.keys):
-            y = start_y + row_idx * (self.key_size + self.key_margin)
-            
-            if row_idx == 3:
-                self.draw_special_row(image, row, y, w, margin, available_width)
-            else:
-                row_width = len(row) * self.key_size + (len(row) - 1) * self.key_margin
-                start_x = margin + (available_width - row_width) // 2
-                
-                for col_idx, key in enumerate(row):
-                    x = start_x + col_idx * (self.key_size + self.key_margin)
-                    
-                    if self.pressed_key == key:
-                        key_color = (0, 180, 120)
-                        border_color = (0, 200, 150)
-                        text_color = (255, 255, 255)
-                    elif self.hover_key == key:
-                        import time
-                        if hasattr(self, 'hover_start_time') and self.hover_start_time > 0:
-                            elapsed = time.time() - self.hover_start_time
-                            progress = min(elapsed / self.hover_duration, 1.0)
-                            blue_val = int(255 - progress * 100)
-                            green_val = int(200 + progress * 55)
-                            key_color = (0, green_val, blue_val)
-                            border_color = (0, 220, 255)
-                        else:
-                            key_color = (0, 200, 255)
-                            border_color = (0, 220, 255)
-                        text_color = (255, 255, 255)
-                    else:
-                        key_color = (245, 245, 245)
-                        border_color = (180, 180, 180)
-                        text_color = (70, 70, 70)
-                    
-                    cv2.rectangle(image, (x, y), (x + self.key_size, y + self.key_size), key_color, -1)
-                    cv2.rectangle(image, (x, y), (x + self.key_size, y + self.key_size), border_color, 2)
-                    
-                    font_scale = min(1.2, self.key_size / 60)
-                    text_size = cv2.getTextSize(key, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0]
-                    text_x = x + (self.key_size - text_size[0]) // 2
-                    text_y = y + (self.key_size + text_size[1]) // 2
-                    
-                    cv2.putText(image, key, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 
-                               font_scale, text_color, 2)
-        
+        layer = self._get_keyboard_layer(h, w)
+        layout = layer['layout']
+
+        x0, y0 = layer['origin']
+        overlay = layer['overlay']
+        region = image[y0:y0 + overlay.shape[0], x0:x0 + overlay.shape[1]]
+        cv2.copyTo(overlay, layer['mask'], region)
+
+        # Only keys whose state differs from the cached idle layer are redrawn
+        rects = layout.rects
+        sessions = list(self.sessions.values())
+        active = {session.hover_key for session in sessions} | {session.pressed_key for session in sessions}
+        for i, word in enumerate(self._suggestion_session.suggestions if self.predictor else ()):
+            key = f'{SUGGESTION_PREFIX}{i + 1}'
+            if key in rects and key not in active:
+                self._draw_key(image, key, rects[key], 'idle', label=word)
+        for session in sessions:
+            if session.hover_key in rects and session.hover_key != session.pressed_key:
+                progress = None
+                if session.hover_start_time > 0:
+                    elapsed = self.clock() - session.hover_start_time
+                    progress = min(elapsed / self.hover_duration, 1.0)
+                key = session.hover_key
+                self._draw_key(image, key, rects[key], 'hover', progress, label=self._key_label(key))
+        for session in sessions:
+            if session.pressed_key in rects:
+                key = session.pressed_key
+                self._draw_key(image, key, rects[key], 'pressed', label=self._key_label(key))
+
+        for session in sessions:
+            if session.swipe_path and len(session.swipe_path) > 1:
+                trail = np.array(session.swipe_path, dtype=np.int32).reshape(-1, 1, 2)
+                cv2.polylines(image, [trail], False, (0, 200, 255), 4)
+
+        margin = layout.margin
         self.draw_text_area(image, w, h, margin)
-        
-        if self.hover_key and hasattr(self, 'hover_start_time') and self.hover_start_time > 0:
-            self.draw_progress_bar(image, w, h, margin, start_y)
-        
+
+        bar_index = 0
+        for session in sessions:
+            if session.hover_key and session.hover_start_time > 0:
+                self.draw_progress_bar(image, w, h, margin, layout.start_y - bar_index * 35, session)
+                bar_index += 1
+
         return image
-    
+
     def draw_text_area(self, image, w, h, margin):
+        layer = self._get_text_layer(w, h, margin)
+        x0, y0 = layer['origin']
+        overlay = layer['overlay']
+        region = image[y0:y0 + overlay.shape[0], x0:x0 + overlay.shape[1]]
+        cv2.copyTo(overlay, layer['mask'], region)
+
+    def _get_text_layer(self, w, h, margin):
+        """Render the text area once per change of any session's buffer"""
+        sessions = self.live_sessions()
+        layer_key = (w, h, margin, tuple((s.slot, s.buffer.version) for s in sessions))
+        if self._text_layer is not None and self._text_layer['key'] == layer_key:
+            return self._text_layer
+
         text_area_height = int(h * 0.12)
         text_area_y = margin
-        
-        cv2.rectangle(image, (margin, text_area_y), (w - margin, text_area_y + text_area_height), 
-                     (255, 255, 255), -1)
-        cv2.rectangle(image, (margin, text_area_y), (w - margin, text_area_y + text_area_height), 
-                     (100, 150, 200), 3)
-        
-        display_text = self.text
-        max_chars = (w - 2 * margin - 40) // 12
-        if len(display_text) > max_chars:
-            display_text = "..." + display_text[-(max_chars-3):]
-        
-        text_y = text_area_y + text_area_height // 2 + 8
-        cv2.putText(image, display_text, (margin + 20, text_y), cv2.FONT_HERSHEY_SIMPLEX, 
-                   1.0, (60, 60, 60), 2)
-        
-        char_text = f"{len(self.text)} chars"
+        instruction = "Pinch to Type  |  Hover to Select  |  Press Q to Quit"
+        (_, instruction_h), _ = cv2.getTextSize(instruction, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        border = 3
+
+        # Strip spans the instruction line above the box down to the box border, which
+        # OpenCV draws up to border - 1 rows past the box edge
+        y0 = max(text_area_y - 10 - instruction_h - 2, 0)
+        y1 = min(text_area_y + text_area_height + border, h)
+        overlay = np.zeros((y1 - y0, w, 3), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, w), dtype=np.uint8)
+        top = text_area_y - y0
+
+        for canvas, box_color, border_color in ((overlay, (255, 255, 255), (100, 150, 200)), (mask, 255, 255)):
+            cv2.rectangle(canvas, (margin, top), (w - margin, top + text_area_height), box_color, -1)
+            cv2.rectangle(canvas, (margin, top), (w - margin, top + text_area_height), border_color, border)
+
+        max_width = w - 2 * margin - 40
+        if len(sessions) == 1:
+            text_y = top + text_area_height // 2 + 8
+            self._draw_text_line(overlay, sessions[0].buffer, "", (margin + 20, text_y), max_width, 1.0)
+        else:
+            # One line per hand, each prefixed with its slot number
+            line_height = text_area_height // len(sessions)
+            for i, session in enumerate(sessions):
+                text_y = top + i * line_height + (line_height + 16) // 2
+                self._draw_text_line(overlay, session.buffer, f"{session.slot + 1}: ",
+                                     (margin + 20, text_y), max_width, 0.8)
+
+        total_chars = sum(len(session.buffer) for session in sessions)
+        char_text = f"{total_chars} chars"
         char_size = cv2.getTextSize(char_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)[0]
-        cv2.putText(image, char_text, (w - margin - char_size[0] - 10, text_area_y + text_area_height - 10), 
+        cv2.putText(overlay, char_text, (w - margin - char_size[0] - 10, top + text_area_height - 10),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (120, 120, 120), 1)
-        
-        instruction = "Pinch to Type  |  Hover to Select  |  Press Q to Quit"
-        cv2.putText(image, instruction, (margin, text_area_y - 10), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (80, 80, 80), 2)
-    
-    def draw_progress_bar(self, image, w, h, margin, keyboard_y):
-        import time
-        elapsed = time.time() - self.hover_start_time
+
+        for canvas, color in ((overlay, (80, 80, 80)), (mask, 255)):
+            cv2.putText(canvas, instruction, (margin, top - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+        self._text_layer = {
+            'key': layer_key,
+            'origin': (0, y0),
+            'overlay': overlay,
+            'mask': mask,
+        }
+        return self._text_layer
+
+    @staticmethod
+    def _fit_text(buffer, prefix, end, max_width, font_scale):
+        """Longest tail of buffer[:end] that fits max_width, measured with the real font"""
+        def width(count):
+            shown = buffer.slice(end - count, end)
+            if count < end:
+                shown = "..." + shown
+            return cv2.getTextSize(prefix + shown, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0][0]
+
+        if width(end) <= max_width:
+            return end
+        # With the "..." prefix the width grows with every extra character, so binary search the count
+        lo, hi = 0, min(end - 1, max_width)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if width(mid) <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def _draw_text_line(self, image, buffer, prefix, origin, max_width, font_scale):
+        cursor = buffer.cursor
+        end = len(buffer)
+        count = self._fit_text(buffer, prefix, end, max_width, font_scale)
+        if cursor < end - count:
+            # Cursor scrolled out of view, keep it at the right edge instead
+            end = cursor
+            count = self._fit_text(buffer, prefix, end, max_width, font_scale)
+
+        before = buffer.slice(end - count, cursor)
+        after = buffer.slice(cursor, end)
+        if count < end:
+            before = "..." + before
+        display_text = prefix + before + after
+        cv2.putText(image, display_text, origin, cv2.FONT_HERSHEY_SIMPLEX,
+                   font_scale, (60, 60, 60), 2)
+
+        (cursor_x, text_h), _ = cv2.getTextSize(prefix + before, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)
+        x = origin[0] + cursor_x + 2
+        cv2.line(image, (x, origin[1] + 4), (x, origin[1] - text_h - 2), (100, 150, 200), 2)
+
+    def draw_progress_bar(self, image, w, h, margin, keyboard_y, session=None):
+        session = session or self.primary
+        elapsed = self.clock() - session.hover_start_time
         progress = min(elapsed / self.hover_duration, 1.0)
         
         bar_y = keyboard_y - 40
@@ -152,173 +385,244 @@ class VirtualKeyboard:
         
         cv2.rectangle(image, (margin, bar_y), (margin + bar_width, bar_y + 15), (150, 150, 150), 1)
         
-        progress_text = f"Typing: {self.hover_key} ({progress*100:.0f}%)"
+        progress_text = f"Typing: {self._key_label(session.hover_key)} ({progress*100:.0f}%)"
+        if len(self.sessions) > 1:
+            progress_text = f"Hand {session.slot + 1} - " + progress_text
         cv2.putText(image, progress_text, (margin, bar_y - 5), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (80, 80, 80), 2)
     
-    def draw_special_row(self, image, row, y, screen_width, margin, available_width):
-        total_margin = self.key_margin * (len(row) - 1)
-        available_for_keys = available_width - total_margin
-        
-        space_width = int(available_for_keys * 0.5)
-        other_width = int(available_for_keys * 0.25)
-        
-        key_widths = {
-            'SPACE': space_width,
-            'CLEAR': other_width,
-            'BACK': other_width
-        }
-        
-        total_width = sum(key_widths[key] for key in row) + total_margin
-        start_x = margin + (available_width - total_width) // 2
-        x = start_x
-        
-        for key in row:
-            width = key_widths[key]
-            
-            if self.pressed_key == key:
-                if key == 'SPACE':
-                    key_color = (0, 180, 120)
-                elif key == 'CLEAR':
-                    key_color = (255, 120, 80)
-                else:
-                    key_color = (255, 160, 0)
-                border_color = (0, 200, 150)
-                text_color = (255, 255, 255)
-            elif self.hover_key == key:
-                import time
-                if hasattr(self, 'hover_start_time') and self.hover_start_time > 0:
-                    elapsed = time.time() - self.hover_start_time
-                    progress = min(elapsed / self.hover_duration, 1.0)
-                    blue_val = int(255 - progress * 100)
-                    green_val = int(200 + progress * 55)
-                    key_color = (0, green_val, blue_val)
-                    border_color = (0, 220, 255)
-                else:
-                    key_color = (0, 200, 255)
-                    border_color = (0, 220, 255)
-                text_color = (255, 255, 255)
+    def session(self, track_id, current_time=None):
+        """Return the session of a tracked hand.
+
+        A new track id takes over an unused session, then a new one while
+        there are fewer than max_hands, and otherwise the idle session that
+        had a hand least recently. With one hand that is always the primary
+        session, so a hand that leaves and returns keeps typing into it.
+        """
+        session = self.sessions.get(track_id)
+        if session is None:
+            idle = [s for s in self.sessions.values() if not s.tracked] or list(self.sessions.values())
+            unused = [s for s in idle if s.last_active is None]
+            if unused:
+                session = min(unused, key=lambda s: s.slot)
+            elif len(self.sessions) < self.max_hands:
+                session = HandSession(len(self.sessions))
             else:
-                if key == 'SPACE':
-                    key_color = (230, 245, 255)
-                    border_color = (100, 150, 200)
-                elif key == 'CLEAR':
-                    key_color = (255, 240, 235)
-                    border_color = (255, 150, 100)
-                else:
-                    key_color = (255, 250, 230)
-                    border_color = (255, 180, 50)
-                text_color = (80, 80, 80)
-            
-            cv2.rectangle(image, (x, y), (x + width, y + self.key_size), key_color, -1)
-            cv2.rectangle(image, (x, y), (x + width, y + self.key_size), border_color, 2)
-            
-            font_scale = min(0.9, width / 80)
-            text_size = cv2.getTextSize(key, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0]
-            text_x = x + (width - text_size[0]) // 2
-            text_y = y + (self.key_size + text_size[1]) // 2
-            
-            cv2.putText(image, key, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 
-                       font_scale, text_color, 2)
-            
-            x += width + self.key_margin
-    
+                session = min(idle, key=lambda s: s.last_active)
+            if self.sessions.get(session.track_id) is session:
+                del self.sessions[session.track_id]
+            session.track_id = track_id
+            self.sessions[track_id] = session
+        session.tracked = True
+        session.last_active = self.clock() if current_time is None else current_time
+        return session
+
+    def live_sessions(self):
+        """Sessions to show: those with a hand or with text, in slot order"""
+        sessions = sorted(self.sessions.values(), key=lambda s: s.slot)
+        live = [s for s in sessions if s.tracked or len(s.buffer)]
+        return live or [self.primary]
+
+    def _emit(self, event_type, session, current_time, **fields):
+        self.events.emit(event_type, t=current_time, hand=session.slot, **fields)
+
+    def _track_events(self, session, current_hover, is_pinching, index_pos, current_time):
+        """Emit hover and pinch events for state changes of one hand"""
+        if current_hover != session.hover_key:
+            self._emit('hover', session, current_time, key=current_hover)
+        if is_pinching != session.pinching:
+            session.pinching = is_pinching
+            position = {} if index_pos is None else {'x': int(index_pos[0]), 'y': int(index_pos[1])}
+            self._emit('pinch', session, current_time, state='start' if is_pinching else 'end', **position)
+
+    def _follow_suggestion_row(self, session, current_hover):
+        # The slots show the list of the hand that moves onto them, so what it reads is what it selects
+        if self.predictor is not None and is_suggestion_key(current_hover) and current_hover != session.hover_key:
+            self._suggestion_session = session
+
+    def _step_session(self, session, current_hover, is_pinching, current_time):
+        """Advance one hand's hover/dwell/pinch state, returns the key to press"""
+        self._follow_suggestion_row(session, current_hover)
+        if current_hover:
+            if current_hover == session.hover_key:
+                if session.hover_start_time == 0:
+                    session.hover_start_time = current_time
+                elif current_time - session.hover_start_time >= self.hover_duration:
+                    if is_pinching and current_time - session.last_press_time > self.press_cooldown:
+                        session.last_press_time = current_time
+                        session.hover_start_time = 0
+                        session.pressed_key = current_hover
+                        return current_hover
+            else:
+                session.hover_key = current_hover
+                session.hover_start_time = current_time
+        else:
+            session.release()
+
+        session.pressed_key = None
+        return None
+
     def check_hover_and_pinch(self, hand_positions, image_shape):
-        import time
-        current_time = time.time()
+        current_time = self.clock()
         
         is_pinching, index_pos = self.check_pinch(hand_positions)
         
         if not index_pos:
-            self.hover_key = None
-            self.hover_start_time = 0
+            self.release_session(self.primary, current_time)
             return None
         
         current_hover = self.check_key_hover(index_pos, image_shape)
-        
-        if current_hover:
-            if current_hover == self.hover_key:
-                if self.hover_start_time == 0:
-                    self.hover_start_time = current_time
-                elif current_time - self.hover_start_time >= self.hover_duration:
-                    if is_pinching and current_time - self.last_press_time > self.press_cooldown:
-                        self.last_press_time = current_time
-                        self.hover_start_time = 0
-                        self.pressed_key = current_hover
-                        return self.process_key_press(current_hover)
-            else:
-                self.hover_key = current_hover
-                self.hover_start_time = current_time
-        else:
-            self.hover_key = None
-            self.hover_start_time = 0
-        
-        self.pressed_key = None
-        return None
-    
+        if self.events is not None:
+            self._track_events(self.primary, current_hover, is_pinching, index_pos, current_time)
+        if self.swipe_decoder is not None:
+            layout = self.get_layout(image_shape[1], image_shape[0])
+            return self._step_swipe(self.primary, current_hover, is_pinching, index_pos, current_time, layout)
+        key = self._step_session(self.primary, current_hover, is_pinching, current_time)
+        return self.process_key_press(key) if key else None
+
+    def _step_swipe(self, session, current_hover, is_pinching, index_pos, current_time, layout):
+        """Swipe mode: a held pinch draws a path, releasing it types a word or taps a key"""
+        self._follow_suggestion_row(session, current_hover)
+        session.hover_key = current_hover
+        session.pressed_key = None
+        if is_pinching:
+            if session.swipe_path is None:
+                session.swipe_path = []
+            session.swipe_path.append((int(index_pos[0]), int(index_pos[1])))
+            return None
+
+        path, session.swipe_path = session.swipe_path, None
+        if not path or current_time - session.last_press_time <= self.press_cooldown:
+            return None
+
+        word = self.swipe_decoder.decode(path, layout)
+        if word is None:
+            # Too short for a swipe, so it was a tap on the key where the pinch started
+            key = layout.key_at(path[0])
+            if key is None:
+                return None
+            session.last_press_time = current_time
+            session.pressed_key = key
+            return self.process_key_press(key, session)
+        session.last_press_time = current_time
+        return self.type_word(word, session)
+
+    def type_word(self, word, session=None):
+        """Insert a whole word, separated from any partial word before the cursor"""
+        session = session or self.primary
+        buffer = session.buffer
+        inserted = (' ' if buffer.current_word() else '') + word + ' '
+        buffer.insert(inserted)
+        self._update_suggestions(session)
+        if self.events is not None:
+            self._emit('key', session, self.clock(), key=None, text=word, insert=inserted)
+        return word
+
+    def update_hands(self, landmarks_px, track_ids, image_shape):
+        """Advance the state of every tracked hand at once.
+
+        landmarks_px is the (hands, 21, 3) pixel landmark array and track_ids
+        the matching hand ids. Hit testing and pinch detection run as single
+        vectorized calls for all hands. Returns (track_id, result) for every
+        key pressed this frame, result being what process_key_press returned
+        (or the decoded word in swipe mode).
+        """
+        current_time = self.clock()
+        h, w = image_shape[:2]
+        layout = self.get_layout(w, h)
+
+        tips = landmarks_px[:, [THUMB_TIP, INDEX_TIP], :2].astype(np.int32)
+        distances = np.linalg.norm((tips[:, 0] - tips[:, 1]).astype(np.float32), axis=-1)
+        pinching = (distances < self.pinch_threshold).tolist()
+        hits = layout.hit_test(tips[:, 1]).tolist()
+        index_tips = tips[:, 1].tolist()
+
+        pressed = []
+        seen = set()
+        for track_id, hit, is_pinching, index_pos in zip(np.asarray(track_ids).tolist(), hits, pinching, index_tips):
+            session = self.session(track_id, current_time)
+            seen.add(track_id)
+            current_hover = layout.labels[hit] if hit >= 0 else None
+            if self.events is not None:
+                self._track_events(session, current_hover, is_pinching, index_pos, current_time)
+            if self.swipe_decoder is not None:
+                result = self._step_swipe(session, current_hover, is_pinching, index_pos, current_time, layout)
+                if result is not None or session.pressed_key:
+                    pressed.append((track_id, result))
+                continue
+            key = self._step_session(session, current_hover, is_pinching, current_time)
+            if key:
+                pressed.append((track_id, self.process_key_press(key, session)))
+
+        for track_id, session in self.sessions.items():
+            if track_id not in seen:
+                self.release_session(session, current_time)
+        return pressed
+
+    def release_session(self, session, current_time=None):
+        """Forget the hover and pinch state of a hand that left the frame"""
+        if self.events is not None and (session.hover_key is not None or session.pinching):
+            current_time = self.clock() if current_time is None else current_time
+            self._track_events(session, None, False, None, current_time)
+        session.pinching = False
+        session.tracked = False
+        session.release()
+
     def check_key_hover(self, finger_pos, image_shape):
         h, w, _ = image_shape
-        margin = 20
-        available_height = int(h * 0.4)
-        start_y = h - available_height - margin
-        
-        for row_idx, row in enumerate(self.keys):
-            y = start_y + row_idx * (self.key_size + self.key_margin)
-            
-            if row_idx == 3:
-                return self.check_special_row_hover(finger_pos, row, y, w, margin)
-            else:
-                available_width = w - 2 * margin
-                row_width = len(row) * self.key_size + (len(row) - 1) * self.key_margin
-                start_x = margin + (available_width - row_width) // 2
-                
-                for col_idx, key in enumerate(row):
-                    x = start_x + col_idx * (self.key_size + self.key_margin)
-                    
-                    if x < finger_pos[0] < x + self.key_size and y < finger_pos[1] < y + self.key_size:
-                        return key
-        
-        return None
-    
-    def check_special_row_hover(self, finger_pos, row, y, screen_width, margin):
-        available_width = screen_width - 2 * margin
-        total_margin = self.key_margin * (len(row) - 1)
-        available_for_keys = available_width - total_margin
-        
-        space_width = int(available_for_keys * 0.5)
-        other_width = int(available_for_keys * 0.25)
-        
-        key_widths = {
-            'SPACE': space_width,
-            'CLEAR': other_width,
-            'BACK': other_width
-        }
-        
-        total_width = sum(key_widths[key] for key in row) + total_margin
-        start_x = margin + (available_width - total_width) // 2
-        x = start_x
-        
-        for key in row:
-            width = key_widths[key]
-            
-            if x < finger_pos[0] < x + width and y < finger_pos[1] < y + self.key_size:
-                return key
-            
-            x += width + self.key_margin
-        
-        return None
-    
-    def process_key_press(self, key):
+        return self.get_layout(w, h).key_at(finger_pos)
+
+    def process_key_press(self, key, session=None):
+        session = session or self.primary
+        event = {'key': key}
+        result = self._edit(session, key, event)
+        self._update_suggestions(session)
+        if self.events is not None:
+            self._emit('key', session, self.clock(), text=result, **event)
+        return result
+
+    def _update_suggestions(self, session):
+        if self.predictor is not None:
+            session.suggestions = self.predictor.suggest(session.buffer.current_word())
+            self._suggestion_session = session
+
+    def _edit(self, session, key, event):
+        buffer = session.buffer
         if key == 'SPACE':
-            self.text += ' '
+            buffer.insert(' ')
             return ' '
         elif key == 'CLEAR':
-            self.text = ""
+            buffer.clear()
             return None
         elif key == 'BACK':
-            if self.text:
-                self.text = self.text[:-1]
+            buffer.delete_back()
+            return None
+        elif key == 'DEL WORD':
+            buffer.delete_word()
+            return None
+        elif key == 'UNDO':
+            buffer.undo()
+            return None
+        elif key == 'LEFT':
+            buffer.move_cursor(-1)
+            return None
+        elif key == 'RIGHT':
+            buffer.move_cursor(1)
             return None
+        elif is_suggestion_key(key):
+            # Complete the partial word before the cursor with the chosen suggestion
+            slot = int(key[len(SUGGESTION_PREFIX):]) - 1
+            if session is not self._suggestion_session:
+                # The slots show another hand's words; show this hand's rather than insert unseen text
+                self._suggestion_session = session
+                return None
+            if slot >= len(session.suggestions):
+                return None
+            word = session.suggestions[slot]
+            event['erase'] = len(buffer.current_word())
+            event['insert'] = word + ' '
+            buffer.replace_back(event['erase'], event['insert'])
+            return word
         else:
-            self.text += key
-            return key
\ No newline at end of file
+            buffer.insert(key)
+            return key
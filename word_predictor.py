@@ -0,0 +1,78 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+DEFAULT_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "word_frequencies.txt")
+
+
+class WordPredictor:
+    """Word completion over a sorted prefix index.
+
+    Words are kept sorted, so every word sharing a prefix sits in one
+    contiguous range found by bisection; the top-k of that range come from an
+    argpartition over the matching counts. When the new prefix extends the last
+    one, only the previous range is searched. The frequency list ("word count"
+    per line) is read on first use or by an explicit load().
+    """
+
+    def __init__(self, path=DEFAULT_WORDS_PATH, top_k=3):
+        self.path = path
+        self.top_k = top_k
+        self.words = None
+        self.counts = None
+        self._lock = threading.Lock()
+        self._prefix = None
+        self._range = (0, 0)
+        self._suggestions = []
+        self._most_common = None
+
+    def load(self):
+        with self._lock:
+            if self.words is not None:
+                return
+            counts = {}
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if not parts or not parts[0].isalpha():
+                        continue
+                    word = parts[0].upper()
+                    count = int(parts[1]) if len(parts) > 1 else 1
+                    counts[word] = counts.get(word, 0) + count
+
+            words = sorted(counts)
+            self.counts = np.array([counts[word] for word in words], dtype=np.int64)
+            self._most_common = self._top(words, 0, len(words))
+            self.words = words  # Set last, other threads treat it as the loaded flag
+
+    def _top(self, words, lo, hi):
+        if hi - lo <= self.top_k:
+            order = range(lo, hi)
+        else:
+            top = np.argpartition(-self.counts[lo:hi], self.top_k)[:self.top_k] + lo
+            order = top.tolist()
+        return [words[i] for i in sorted(order, key=lambda i: (-self.counts[i], words[i]))]
+
+    def suggest(self, prefix):
+        """Return up to top_k completions of prefix, most frequent first"""
+        if self.words is None:
+            self.load()
+        prefix = prefix.upper()
+        if not prefix:
+            return self._most_common
+        if prefix == self._prefix:
+            return self._suggestions
+
+        if self._prefix is not None and prefix.startswith(self._prefix):
+            lo, hi = self._range
+        else:
+            lo, hi = 0, len(self.words)
+        lo = bisect_left(self.words, prefix, lo, hi)
+        hi = bisect_right(self.words, prefix + '\uffff', lo, hi)
+
+        self._prefix = prefix
+        self._range = (lo, hi)
+        self._suggestions = self._top(self.words, lo, hi)
+        return self._suggestions